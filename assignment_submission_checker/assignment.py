@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
@@ -8,6 +7,12 @@ from typing import List, Optional
 from .directory import Directory, DirectoryDict
 from .utils import copy_tree
 
+try:
+    # orjson decodes considerably faster, but is an optional dependency.
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 DIR_STRUCTURE_KEY = "structure"
 GIT_BRANCH_KEY = "git-marking-branch"
 ID_KEY = "number"
@@ -71,10 +76,10 @@ class Assignment:
         :returns: An `Assignment` instance with the specification found in the file.
         """
         if file is not None:
-            with open(file, "r") as f:
-                json_info = json.load(f)
+            with open(file, "rb") as f:
+                json_info = json_loads(f.read())
         elif json_str is not None:
-            json_info = json.loads(json_str)
+            json_info = json_loads(json_str)
         else:
             raise RuntimeError("Please provide either a valid file path, or json string.")
 
@@ -121,9 +126,11 @@ class Assignment:
         """
         Validates that the submission directory provided matches the specifications of this instance.
 
-        The validation process creates a copy of the submission directory and the directory tree
-        beneath it, so operations like git checkouts can be conducted without altering the user's
-        working directory.
+        If the specification expects a git repository, the validation process creates a copy of
+        the submission directory and the directory tree beneath it, so operations like git
+        checkouts can be conducted without altering the user's working directory.
+        Otherwise, validation only reads from the filesystem and is conducted on the submission
+        directory itself.
 
         The temporary directory is always manually cleaned up by the program, though the
         OS should handle this if an uncaught error is encountered.
@@ -132,8 +139,12 @@ class Assignment:
         :param tmp_dir: Temporary directory to use to unpack and validate submission.
         :param ignore_extra_files: Suppress warnings about unexpected files that match the patterns given.
         """
-        # Copy to the temporary directory
-        submission = copy_tree(submission_dir, tmp_dir, into=True)
+        if self.directory_structure.contains_git_root:
+            # Copy to the temporary directory
+            submission = copy_tree(submission_dir, tmp_dir, into=True)
+        else:
+            # Nothing will alter the submission, so there is no need to copy it
+            submission = Path(submission_dir).absolute()
 
         # Check the submission content
         check_log = self.directory_structure.check_against_directory(
@@ -1,6 +1,10 @@
 import argparse
+import codecs
+import os
 import sys
+from functools import cache
 from pathlib import Path
+from typing import List, Optional
 from warnings import warn
 
 from . import __version__
@@ -37,8 +41,13 @@ class CLIParser(argparse.ArgumentParser):
         sys.exit(2)
 
 
-def cli():
-    """CLI handle for the assignment submission checker package."""
+@cache
+def build_parser() -> CLIParser:
+    """
+    Build the command-line parser for the package.
+
+    The parser is only built once, and the same instance is returned by subsequent calls.
+    """
     parser = CLIParser(description=DESCRIPTION)
 
     parser.add_argument(
@@ -67,7 +76,6 @@ def cli():
         default=None,
         help="Redirect any (text) output to the given location.",
         type=str,
-        nargs=1,
     )
     parser.add_argument(
         "-q",
@@ -99,25 +107,64 @@ def cli():
         "or the path to the specification file if using the -l or --local-specs option. "
         f"See {ASSIGNMENT_SPEC_REFERENCES}/README.md for an explanation of the YYYY-assignment_id format, "
         f"and {ASSIGNMENT_SPEC_REFERENCES} for a list of available assignment specifications.",
-        nargs=1,
         type=str,
     )
     parser.add_argument(
         "submission",
         help="Path to your submission folder, "
         "or the HTTPS / SSH clone link of your GitHub classroom repository if using the -g or --github-clone option.",
-        nargs=1,
         type=str,
     )
+    return parser
+
+
+def print_version_and_exit(prog: str) -> None:
+    """
+    Print the version of the package, as reported by the `-v` or `--version` flags, and exit.
+
+    :param prog: Name of the program, as it appears in the command-line help.
+    """
+    print(f"{prog}, {__version__}")
+    sys.exit(0)
+
+
+def version_requested(argv: List[str]) -> bool:
+    """
+    Whether the command-line arguments given ask for the version of the package.
 
-    args = parser.parse_args()
+    Arguments after ``--`` are positional, so cannot be the version flag.
+    Short flags that have been combined (EG ``-qv``) are left for the parser to detect.
+
+    :param argv: Command-line arguments, excluding the program name.
+    """
+    for arg in argv:
+        if arg == "--":
+            return False
+        if arg in ("-v", "--version"):
+            return True
+    return False
+
+
+def cli(argv: Optional[List[str]] = None):
+    """
+    CLI handle for the assignment submission checker package.
+
+    :param argv: Command-line arguments, excluding the program name.
+    Defaults to the arguments the program was run with.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Answer version requests without constructing (or validating arguments with) the parser.
+    if version_requested(argv):
+        print_version_and_exit(os.path.basename(sys.argv[0]))
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
     args_to_main = {}
 
     if args.version:
-        print(f"{parser.prog}, {__version__}")
-        sys.exit(0)
-    args.assignment = args.assignment[0]
-    args.submission = args.submission[0]
+        print_version_and_exit(parser.prog)
     if args.ignore_unexpected_files is not None and len(args.ignore_unexpected_files) == 0:
         args.ignore_unexpected_files = ["*", "**"]
 
@@ -126,8 +173,6 @@ def cli():
         parser.print_help_and_exit(
             msg="You have suppressed console output but have not provided an alternative output location."
         )
-    elif args.output_file is not None:
-        args.output_file = args.output_file[0]
 
     # Check that the supposed local copy of the file is actually exists if we are being asked to use it.
     if args.local_specs:
@@ -150,21 +195,50 @@ def cli():
         args_to_main["github_clone_url"] = args.submission
     else:
         submission_path = Path(args.submission)
-        if not submission_path.exists():
+        try:
+            submission_path.stat()
+        except OSError:
             parser.print_help_and_exit(
                 f"The path {submission_path} that you have provided as your submission does not exist."
             )
-        args_to_main["submission"] = Path(args.submission)
+        args_to_main["submission"] = submission_path
 
     # Call main() to actually run the checks
     string_output = main(**args_to_main)
 
-    # Write to stdout if not running quietly
+    # The report is only encoded for the outputs that were requested.
+    # File names in the report may contain bytes that could not be decoded (as surrogates),
+    # which are written back as the original bytes, as stdout does under a C/POSIX locale.
+    file_bytes = (
+        string_output.encode("utf-8", errors="surrogateescape") if args.output_file else None
+    )
+
+    # Write to stdout if not running quietly.
+    # The report is written straight to the underlying binary buffer, where there is one,
+    # rather than passing through the text layer.
+    # It is encoded as the text layer would have encoded it,
+    # reusing the bytes for the file if these are the same.
+    # Where lines do not end in "\n" (Windows), the text layer is still used,
+    # since it translates the line endings.
     if not args.quiet:
-        sys.stdout.write(string_output)
+        if hasattr(sys.stdout, "buffer") and os.linesep == "\n":
+            stdout_encoding = codecs.lookup(sys.stdout.encoding or "utf-8").name
+            stdout_errors = sys.stdout.errors or "strict"
+            if (
+                file_bytes is not None
+                and stdout_encoding == "utf-8"
+                and stdout_errors == "surrogateescape"
+            ):
+                stdout_bytes = file_bytes
+            else:
+                stdout_bytes = string_output.encode(stdout_encoding, errors=stdout_errors)
+            sys.stdout.flush()
+            sys.stdout.buffer.write(stdout_bytes)
+            sys.stdout.buffer.flush()
+        else:
+            sys.stdout.write(string_output)
     # Write to file buffer if requested
-    if args.output_file:
-        with open(Path(args.output_file), "w") as f:
-            f.write(string_output)
+    if file_bytes is not None:
+        Path(args.output_file).write_bytes(file_bytes)
 
     sys.exit(0)
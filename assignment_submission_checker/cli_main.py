@@ -1,35 +1,115 @@
-import shutil
+import os
+from functools import lru_cache
 from pathlib import Path
-from tempfile import mkdtemp
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import requests
+from assignment_submission_checker import __version__
 
-from assignment_submission_checker.assignment import Assignment
-from assignment_submission_checker.git_utils import clone_and_fetch_all_refs
-from assignment_submission_checker.utils import provide_tmp_directory
+if TYPE_CHECKING:
+    from email.message import Message
+
+# The remaining imports are deferred to the functions that need them,
+# so that the CLI can show its help or version without loading the checker.
 
 ASSIGNMENT_SPEC_REFERENCES = (
     "https://github.com/UCL-COMP0233-24-25/assignment-submission-checker/tree/main/specs"
 )
 GH_RAW_FETCH = "https://raw.githubusercontent.com/UCL-COMP0233-24-25/assignment-submission-checker/refs/heads/main/specs"
+SPEC_CACHE_DIR_NAME = "assignment-submission-checker"
+# Identifies the checker (and its version) in requests made to GitHub
+USER_AGENT = f"assignment-submission-checker/{__version__}"
+
+
+def spec_cache_dir() -> Path:
+    """
+    Directory in which fetched assignment specifications are cached.
+
+    This is a subdirectory of `$XDG_CACHE_HOME` if it is set, and of `~/.cache` otherwise.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / SPEC_CACHE_DIR_NAME
+
+
+def http_get(
+    url: str, headers: Dict[str, str], timeout: float = 10
+) -> Tuple[int, "Message", bytes]:
+    """
+    Send a GET request to the url given, returning the status, headers, and body of the response.
+
+    Redirects are followed, and any proxy configured in the environment is used.
+    Responses with an error status (or 304 Not Modified) are returned, rather than raised.
+
+    Raises an `OSError` if the server cannot be reached.
+
+    :param url: Location to send the request to.
+    :param headers: Headers to send with the request.
+    :param timeout: Seconds to wait for the server before giving up.
+    """
+    from http.client import HTTPException
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as r:
+            return r.status, r.headers, r.read()
+    except HTTPError as e:
+        with e:
+            return e.code, e.headers, e.read()
+    except HTTPException as e:
+        raise OSError(f"Malformed response from {url}") from e
 
 
-def fetch_spec(assignment_spec: str) -> None:
+@lru_cache(maxsize=32)
+def fetch_spec(assignment_spec: str) -> str:
     """
     Fetches the assignment specification given from the assignment checker repository.
 
+    Fetched specifications are cached on disk (see `spec_cache_dir`) alongside their ETag.
+    If a cached copy exists, the request asks the server to only send the specification if it
+    has changed, and the cached copy is used if it has not, or if the server cannot be reached.
+    Specifications are also remembered in memory, so each is only fetched once per process.
+
     Raises a runtime error if the assignment specification is not recognised.
     """
+    from http import HTTPStatus
+
     send_to = f"{GH_RAW_FETCH}/{assignment_spec}.json"
-    r = requests.get(send_to)
-    if not r.ok:
+    cache_file = spec_cache_dir() / f"{assignment_spec}.json"
+    etag_file = cache_file.with_suffix(".etag")
+
+    headers = {"User-Agent": USER_AGENT}
+    if cache_file.is_file() and etag_file.is_file():
+        headers["If-None-Match"] = etag_file.read_text().strip()
+
+    try:
+        status, response_headers, body = http_get(send_to, headers)
+    except OSError:
+        if cache_file.is_file():
+            return cache_file.read_text()
+        raise
+
+    if status == HTTPStatus.NOT_MODIFIED:
+        return cache_file.read_text()
+    elif status != HTTPStatus.OK:
         raise RuntimeError(
             f"Failed to locate assignment specification {assignment_spec}, "
             "please check the reference you have provided. "
             f"You can view all available references at {ASSIGNMENT_SPEC_REFERENCES}"
         )
-    return r.text
+    spec = body.decode(response_headers.get_content_charset("utf-8"))
+    etag = response_headers.get("ETag")
+
+    # Failing to cache the specification should not prevent it from being used.
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(spec)
+        if etag is not None:
+            etag_file.write_text(etag)
+        else:
+            etag_file.unlink(missing_ok=True)
+    except OSError:
+        pass
+    return spec
 
 
 def main(
@@ -43,46 +123,45 @@ def main(
     Online specs take priority over local specs (assignment > local_specs)
     Online repo takes priority over local submission (github_clone_url > submission)
     """
-    if assignment_lookup is not None:
-        assignment = Assignment.from_json(json_str=fetch_spec(assignment_lookup))
-    elif local_specs is not None:
-        assignment = Assignment.from_json(Path(local_specs))
-    else:
+    from assignment_submission_checker.assignment import Assignment
+    from assignment_submission_checker.utils import tmp_directory
+
+    if assignment_lookup is None and local_specs is None:
         raise RuntimeError("Need at least one of assignment or local_specs arguments.")
+    if github_clone_url is None and submission is None:
+        raise RuntimeError("Need either a local submission folder or a GH repo to clone.")
 
-    if github_clone_url is not None:
-        # Attempt to clone GH repo and place into temp folder
-        # then set that as the submission directory
-        tmp_dir = Path(mkdtemp("safe_clone"))
-        clone_dir = tmp_dir / "cloned"
-        clone_dir.mkdir(exist_ok=True)
+    # A local specification is read straight away, so a bad file is reported before cloning.
+    # One from GitHub is only fetched once the submission is in place,
+    # so a failed clone is reported without waiting on the network.
+    assignment = Assignment.from_json(local_specs) if assignment_lookup is None else None
 
-        repo_name = clone_and_fetch_all_refs(github_clone_url, clone_dir)
+    # Everything temporary (the clone, and the copy of the submission that is validated) is kept
+    # beneath a single temporary directory, so it shares a filesystem and is removed in one go.
+    with tmp_directory(prefix="assignment-checker-", clean_in_background=True) as tmp_dir:
+        if github_clone_url is not None:
+            from assignment_submission_checker.git_utils import (
+                clone_and_fetch_all_refs,
+                repo_name_from_url,
+            )
 
-        # Relocate the cloned repository deeper inside another temporary folder, so that
-        # names match up with those expected.
-        submission_dir = tmp_dir / repo_name
-        shutil.move(clone_dir, submission_dir)
+            # Attempt to clone GH repo into a temp folder
+            # then set that as the submission directory.
+            # The clone is placed deeper inside the temporary folder, so that names
+            # match up with those expected.
+            submission_dir = tmp_dir / "clone" / repo_name_from_url(github_clone_url)
+            clone_and_fetch_all_refs(github_clone_url, submission_dir)
+        else:
+            submission_dir = submission if isinstance(submission, Path) else Path(submission)
 
-    elif submission is not None:
-        submission_dir = Path(submission)
-    else:
-        raise RuntimeError("Need either a local submission folder or a GH repo to clone.")
+        if assignment is None:
+            assignment = Assignment.from_json(json_str=fetch_spec(assignment_lookup))
 
-    # Setup validator with a temporary directory.
-    # Note that this does mean we may have two copies of the repository on the file system,
-    # but this is safer than risking a clone directly into /tmp.
-    @provide_tmp_directory(
-        clean_on_error=True,
-        clean_on_success=True,
-        pass_dir_as_arg="tmp_dir",
-    )
-    def validator(tmp_dir: Path) -> str:
+        # Validate and collect output.
+        # Note that this does mean we may have two copies of the repository on the file system,
+        # but this is safer than risking a clone directly into /tmp.
         return assignment.validate_assignment(
             submission_dir=submission_dir,
-            tmp_dir=tmp_dir,
+            tmp_dir=tmp_dir / "validation",
             ignore_extra_files=ignore_unexpected_files,
         )
-
-    # Validate and collect output
-    return validator()
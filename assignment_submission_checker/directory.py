@@ -1,23 +1,44 @@
 from __future__ import annotations
 
-import fnmatch
+import heapq
 import os
+import re
+import sys
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, Generator, Iterator, List, Optional, Tuple, TypeAlias
-
-import git
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeAlias,
+)
 
 from assignment_submission_checker.git_utils import (
-    GIT_ROOT_PATTERNS,
+    GIT_REPO_MARKERS,
+    GIT_ROOT_REGEX,
     is_clean,
     is_git_repo,
+    open_repo,
     switch_to_main_if_possible,
 )
 from assignment_submission_checker.logging.log_entry import LogEntry, LogType
 from assignment_submission_checker.logging.logger import Logger
-from assignment_submission_checker.utils import match_to_unique_assignments
+from assignment_submission_checker.utils import (
+    compile_shell_patterns,
+    match_to_unique_assignments,
+    scan_directory,
+)
 
 DirectoryDict: TypeAlias = Dict[str, Any]
+# Maps (id of a Directory, folder on the filesystem) to the result of checking one against the other
+ProbeCache: TypeAlias = Dict[Tuple[int, str], Logger]
 
 COMPULSORY_FILES_KEY = "compulsory"
 DATA_PATTERNS_KEY = "data-file-types"
@@ -25,18 +46,34 @@ GIT_ROOT_KEY = "git-root"
 OPTIONAL_FILES_KEY = "optional"
 VARIABLE_NAME_KEY = "variable-name"
 
-METADATA_KEYS = {
-    COMPULSORY_FILES_KEY,
-    DATA_PATTERNS_KEY,
-    GIT_ROOT_KEY,
-    OPTIONAL_FILES_KEY,
-    VARIABLE_NAME_KEY,
-}
+METADATA_KEYS = frozenset(
+    (
+        COMPULSORY_FILES_KEY,
+        DATA_PATTERNS_KEY,
+        GIT_ROOT_KEY,
+        OPTIONAL_FILES_KEY,
+        VARIABLE_NAME_KEY,
+    )
+)
 
 
 class Directory:
 
+    _all_files: List[str]
+    _compulsory_set: FrozenSet[str]
+    _data_patterns_set: FrozenSet[str]
+    _data_regex: Optional[re.Pattern]
+    _fixed_name_subdirs: Tuple[Directory, ...]
+    _fixed_names: FrozenSet[str]
+    _is_optional: bool
+    _name_regex: Optional[re.Pattern]
+    _optional_set: FrozenSet[str]
+    _path_from_root: Optional[Path]
+    _subdirs_by_name: Dict[str, Directory]
+    _variable_name_subdirs: Tuple[Directory, ...]
+
     compulsory: List[str]
+    contains_git_root: bool
     data_file_patterns: List[str]
     git_root: bool = False
     name: str
@@ -46,11 +83,11 @@ class Directory:
     subdirs: List[Directory]
 
     @property
-    def fixed_name_subdirs(self) -> List[Directory]:
+    def fixed_name_subdirs(self) -> Tuple[Directory, ...]:
         """
         Subdirectories of this Directory that do not have variable names.
         """
-        return [s for s in self.subdirs if not s.variable_name]
+        return self._fixed_name_subdirs
 
     @property
     def is_optional(self) -> bool:
@@ -58,10 +95,10 @@ class Directory:
         Returns True if the directory is an optional inclusion in the submission,
         and returns False otherwise.
 
-        A directory is optional if it contains no compulsory files.
+        A directory is optional if it contains no compulsory files,
+        and all of its subdirectories are optional.
         """
-        all_subdirs_are_optional = all(s.is_optional for s in self.subdirs)
-        return all_subdirs_are_optional and not bool(self.compulsory)
+        return self._is_optional
 
     @property
     def path_from_root(self) -> Path:
@@ -69,11 +106,16 @@ class Directory:
         Path to this directory, from the root of the directory tree.
 
         If self.parent = None, this Directory is assumed to be the root of the tree.
+
+        The path is computed on first access and cached, until the name of this Directory
+        (or one of its parents) is changed.
         """
-        if self.parent is None:
-            return Path(".")
-        else:
-            return self.parent.path_from_root / self.name
+        if self._path_from_root is None:
+            if self.parent is None:
+                self._path_from_root = Path(".")
+            else:
+                self._path_from_root = self.parent.path_from_root / self.name
+        return self._path_from_root
 
     @property
     def variable_name(self) -> bool:
@@ -83,79 +125,59 @@ class Directory:
         return bool(self.name_pattern)
 
     @property
-    def variable_name_subdirs(self) -> List[Directory]:
+    def variable_name_subdirs(self) -> Tuple[Directory, ...]:
         """
         Subdirectories of this Directory that have variable names.
         """
-        return [s for s in self.subdirs if s.variable_name]
+        return self._variable_name_subdirs
 
     def __init__(
         self, name: str, directory_structure: DirectoryDict = {}, parent: Optional[Directory] = None
     ) -> None:
-        self.name = name
-        self.parent = parent
-
-        # Determine if this directory is the git root
-        self.git_root = (
-            directory_structure[GIT_ROOT_KEY] if GIT_ROOT_KEY in directory_structure else False
-        )
-
-        # Record compulsory and optional files
-        self.compulsory = (
-            sorted(directory_structure[COMPULSORY_FILES_KEY])
-            if COMPULSORY_FILES_KEY in directory_structure
-            else []
-        )
-        self.optional = (
-            sorted(directory_structure[OPTIONAL_FILES_KEY])
-            if OPTIONAL_FILES_KEY in directory_structure
-            else []
-        )
-
-        # If this is a data directory, record the file patterns we expect to find in it.
-        self.data_file_patterns = (
-            sorted(directory_structure[DATA_PATTERNS_KEY])
-            if DATA_PATTERNS_KEY in directory_structure
-            else []
-        )
-
-        # Record if this directory may have a user-defined name
-        self.name_pattern = (
-            directory_structure[VARIABLE_NAME_KEY]
-            if VARIABLE_NAME_KEY in directory_structure
-            else ""
-        )
-
-        # Now, use recursion to create the list of directories that this directory contains.
-        self.subdirs = sorted(
-            Directory(name, info, parent=self)
-            for name, info in directory_structure.items()
-            if name not in METADATA_KEYS
-        )
+        # The tree below this Directory is built with an explicit stack, rather than by recursion.
+        # Each Directory reads its own part of the specification as it is taken from the stack,
+        # then the attributes that depend on subdirectories are set bottom-up once all are built.
+        built: List[Tuple[Directory, List[Directory]]] = []
+        to_build = [(self, name, directory_structure, parent)]
+        while to_build:
+            directory, d_name, d_structure, d_parent = to_build.pop()
+            directory._read_specification(d_name, d_structure, d_parent)
+
+            # Every key that is not metadata names a subdirectory.
+            # The order of the set difference does not matter, as subdirectories are sorted by name.
+            subdirs = []
+            for subdir_name in d_structure.keys() - METADATA_KEYS:
+                subdir = Directory.__new__(Directory)
+                subdirs.append(subdir)
+                to_build.append((subdir, subdir_name, d_structure[subdir_name], directory))
+            built.append((directory, subdirs))
+
+        # Subdirectories are always built after their parents.
+        for directory, subdirs in reversed(built):
+            directory._set_subdirs(subdirs)
 
     def __getitem__(self, key: Path | str) -> Directory:
         """
         Fetch the subdirectory of this directory with the given name,
         if it exists.
 
-        Passing a path-like string or Path will attempt to traverse the directory structure.
+        Passing a path-like string or Path will attempt to traverse the directory structure,
+        descending one part of the path at a time. A part of '..' moves up to the parent directory.
         """
         if isinstance(key, str):
             key = Path(key)
-        if len(key.parts) == 0:
-            return self
-        elif key.parts[0] == "..":
-            if self.parent:
-                return self.parent
+        directory = self
+        for part in key.parts:
+            if part == "..":
+                if directory.parent is None:
+                    raise ValueError(f"{directory.name} is the root directory.")
+                directory = directory.parent
             else:
-                raise ValueError(f"{self.name} is the root directory.")
-        matched_directories = [d for d in self if d.path_from_root == key]
-        if len(matched_directories) > 1:
-            raise ValueError(f"{key} is the name of multiple subdirectories of {self.name}.")
-        elif len(matched_directories) == 0:
-            raise ValueError(f"{key} is not a subdirectory of {self.name}.")
-        # There is assuredly 1 entry in the list now
-        return matched_directories[0]
+                try:
+                    directory = directory._subdirs_by_name[part]
+                except KeyError:
+                    raise ValueError(f"{key} is not a subdirectory of {self.name}.") from None
+        return directory
 
     def __iter__(self) -> Iterator[Directory]:
         return self.traverse()
@@ -168,20 +190,20 @@ class Directory:
         if not isinstance(other, Directory):
             return False
         # The two instances, at top level, are identical.
-        truth_value = (
+        if not (
             (self.name == other.name or self.name_pattern == other.name_pattern)
             and self.git_root == other.git_root
-            and set(self.compulsory) == set(other.compulsory)
-            and set(self.data_file_patterns) == set(other.data_file_patterns)
-            and set(self.optional) == set(other.optional)
-        )
+            and self._compulsory_set == other._compulsory_set
+            and self._data_patterns_set == other._data_patterns_set
+            and self._optional_set == other._optional_set
+        ):
+            return False
         # The subdirectories that each contains are equal.
+        # Subdirectories are sorted by their names in the specification when they are built,
+        # so corresponding subdirectories are at the same positions.
         if len(self.subdirs) != len(other.subdirs):
             return False
-        else:
-            for my_subdir, their_subdir in zip(sorted(self.subdirs), sorted(other.subdirs)):
-                truth_value = truth_value and (my_subdir == their_subdir)
-        return truth_value
+        return all(mine == theirs for mine, theirs in zip(self.subdirs, other.subdirs))
 
     def __le__(self, other: Directory) -> bool:
         return self.name <= other.name
@@ -194,8 +216,8 @@ class Directory:
 
     def __str__(self) -> str:
         files = "\n".join(
-            f"\t{file} [opt]" if file in self.optional else f"\t{file}"
-            for file in sorted(self.compulsory + self.optional)
+            f"\t{file} [opt]" if file in self._optional_set else f"\t{file}"
+            for file in self._all_files
         )
         if files:
             files = f"\n{files}"
@@ -213,16 +235,162 @@ class Directory:
     def traverse(self) -> Generator[Directory]:
         """
         Traverse down the directory tree, yielding self first then descending into subdirectories.
+
+        The tree is traversed with an explicit stack, rather than through nested generators.
+        """
+        stack = [self]
+        while stack:
+            directory = stack.pop()
+            yield directory
+            # Reversed, so that subdirectories are taken from the stack in order.
+            stack.extend(reversed(directory.subdirs))
+
+    def walk(self) -> Generator[Directory]:
+        """
+        Walk the directory tree breadth-first, yielding self first.
+
+        Unlike `traverse`, which descends into each subdirectory in turn,
+        every Directory at one depth is yielded before any of those below it.
+        """
+        queue = deque([self])
+        while queue:
+            directory = queue.popleft()
+            yield directory
+            queue.extend(directory.subdirs)
+
+    def _investigate_subdirs(
+        self,
+        directory: Path,
+        to_investigate: List[Tuple[str, Directory]],
+        subdir_entries: Dict[str, os.DirEntry],
+        **investigate_kwargs,
+    ) -> Iterator[Logger]:
+        """
+        Investigate each of the given subdirectories (see `investigate_subdir`),
+        yielding the resulting `Logger`s in the order the subdirectories were given.
+
+        Each subdirectory is only investigated once the previous `Logger` has been consumed,
+        so the caller can stop early on a FATAL error.
+
+        :param directory: The directory on the file system that this instance is being compared to.
+        :param to_investigate: Pairs of folder names in `directory` and the subdirectories to compare them to.
+        :param subdir_entries: The folders in `directory`, by name.
+        :param investigate_kwargs: Passed to `investigate_subdir`.
+        """
+        jobs = [
+            (directory / name, subdir, subdir_entries.get(name)) for name, subdir in to_investigate
+        ]
+        # Folders missing from the listing of `directory` are known not to exist,
+        # so do not need to be looked for again.
+        investigate_kwargs["known_dir"] = True
+        for path, subdir, entry in jobs:
+            yield self.investigate_subdir(path, subdir, subdir_entry=entry, **investigate_kwargs)
+
+    def _read_specification(
+        self, name: str, directory_structure: DirectoryDict, parent: Optional[Directory]
+    ) -> None:
+        """
+        Set the attributes of this Directory that only depend on its own part of the specification.
+
+        :param name: Name of the directory.
+        :param directory_structure: Specification of the directory.
+        :param parent: The Directory that contains this one, if any.
+        """
+        # Names are interned, since the same (small) set of names is compared repeatedly
+        # when checking submissions against the specification.
+        self.name = sys.intern(name)
+        self.parent = parent
+        self._path_from_root = None
+
+        # Determine if this directory is the git root
+        self.git_root = (
+            directory_structure[GIT_ROOT_KEY] if GIT_ROOT_KEY in directory_structure else False
+        )
+
+        # Record compulsory and optional files
+        self.compulsory = (
+            sorted(map(sys.intern, directory_structure[COMPULSORY_FILES_KEY]))
+            if COMPULSORY_FILES_KEY in directory_structure
+            else []
+        )
+        self.optional = (
+            sorted(map(sys.intern, directory_structure[OPTIONAL_FILES_KEY]))
+            if OPTIONAL_FILES_KEY in directory_structure
+            else []
+        )
+        # Set views of the files, for membership tests and set arithmetic when checking
+        self._compulsory_set = frozenset(self.compulsory)
+        self._optional_set = frozenset(self.optional)
+        # All of the files, in order, for rendering. Both lists are sorted, so only need merging.
+        self._all_files = list(heapq.merge(self.compulsory, self.optional))
+
+        # If this is a data directory, record the file patterns we expect to find in it.
+        self.data_file_patterns = (
+            sorted(directory_structure[DATA_PATTERNS_KEY])
+            if DATA_PATTERNS_KEY in directory_structure
+            else []
+        )
+        self._data_patterns_set = frozenset(self.data_file_patterns)
+        # Compiled into a single expression, so each file is checked against all patterns at once.
+        self._data_regex = compile_shell_patterns(
+            os.path.normcase(pattern) for pattern in self.data_file_patterns
+        )
+
+        # Record if this directory may have a user-defined name
+        self.name_pattern = (
+            directory_structure[VARIABLE_NAME_KEY]
+            if VARIABLE_NAME_KEY in directory_structure
+            else ""
+        )
+        # Compiled once, since candidate folder names are checked against it repeatedly.
+        # Names are normalised as fnmatch.fnmatch would, before matching.
+        self._name_regex = compile_shell_patterns(
+            [os.path.normcase(self.name_pattern)] if self.name_pattern else []
+        )
+
+    def _rename(self, new_name: str) -> None:
         """
-        yield self
-        for d in self.subdirs:
-            yield from d.traverse()
+        Change the name of this Directory, updating everything that depends on it.
+
+        The cached `path_from_root` of this Directory and all of its subdirectories are discarded,
+        and the parent Directory is updated so it can still fetch this Directory by name.
+
+        :param new_name: Name to give this Directory.
+        """
+        self.name = new_name
+        for d in self.walk():
+            d._path_from_root = None
+        if self.parent is not None:
+            self.parent._subdirs_by_name = {s.name: s for s in self.parent.subdirs}
+
+    def _set_subdirs(self, subdirs: List[Directory]) -> None:
+        """
+        Set the subdirectories of this Directory, along with the attributes that depend on them.
+
+        The subdirectories must have had their own subdirectories set already.
+
+        :param subdirs: Directories that this Directory contains.
+        """
+        self.subdirs = sorted(subdirs)
+        self._subdirs_by_name = {s.name: s for s in self.subdirs}
+        # Split the subdirectories by whether they have variable names, once.
+        self._fixed_name_subdirs = tuple(s for s in self.subdirs if not s.variable_name)
+        self._variable_name_subdirs = tuple(s for s in self.subdirs if s.variable_name)
+        self._fixed_names = frozenset(s.name for s in self._fixed_name_subdirs)
+        # Whether a git repository is expected anywhere in this tree,
+        # determined bottom-up as the tree is built.
+        self.contains_git_root = self.git_root or any(s.contains_git_root for s in self.subdirs)
+        # Likewise for optionality, which cannot change once the tree is built.
+        self._is_optional = not self.compulsory and all(s.is_optional for s in self.subdirs)
 
     def check_against_directory(
         self,
         directory: Path,
         do_not_set_name: bool = False,
         *substitutes_for_main_branch: str,
+        directory_entry: Optional[os.DirEntry] = None,
+        probe: bool = False,
+        probe_cache: Optional[ProbeCache] = None,
     ) -> Logger:
         """
         Given a directory on the machine, determine if the contents of the directory are compatible with
@@ -279,12 +447,23 @@ class Directory:
         name from the filesystem.
         This is exclusively used when attempting to match variable-named subdirectories to those on the filesystem.
         :param substitutes_for_main_branch: Branch names that, if `main` is not present in the expected git repository, may be used instead.
+        :param directory_entry: The entry for `directory` from listing its parent, if available.
+        Its cached type information is used in place of checking the filesystem again.
+        :param probe: Only determine whether the directory is compatible with this instance, as is
+        needed when trialling matches. INFORMATION is not logged, and the files in the directory are not
+        checked if a WARNING has already been logged for it, since they cannot make the check FATAL.
+        :param probe_cache: Results of trial matches of variable-named subdirectories to folders, shared
+        across the whole check so that each pairing is only checked once. Created if not provided.
+        Each repository has a cache of its own, since checking it can check out a branch.
         """
+        if probe_cache is None:
+            probe_cache = {}
         logger = Logger(current_directory=directory)
 
-        if not directory.is_dir():
+        is_dir = directory_entry.is_dir() if directory_entry is not None else directory.is_dir()
+        if not is_dir:
             logger.add_entry(LogType.FATAL_NOT_A_DIR)
-        if logger.fatal:
+        if logger.is_fatal:
             return logger
 
         # Check name
@@ -296,43 +475,66 @@ class Directory:
             else:
                 logger.add_entry(LogType.FATAL_DIR_NAME_MATCH_FIXED, self.name)
                 return logger
-        if self.name != name_before:
+        if self.name != name_before and not probe:
             logger.add_entry(LogType.INFO_MATCHED_DIR_NAME, self.name_pattern)
-        if logger.fatal:
+        if logger.is_fatal:
             return logger
 
+        # List the folder once, for checking for a repository, its files, and its subdirectories.
+        # A git root is only listed once its repository has been checked,
+        # since checking out the marking branch can change what the folder contains.
+        listing = None if self.git_root else scan_directory(directory)
+
         # Check for presence (or absence) of git repository
-        git_log = self.check_git_repo(directory, *substitutes_for_main_branch)
+        git_log = self.check_git_repo(
+            directory,
+            *substitutes_for_main_branch,
+            probe=probe,
+            entry_names=(listing[0] | listing[1].keys()) if listing is not None else None,
+        )
         if git_log:
             logger.add_entry(git_log)
             if git_log.log_type.is_fatal:
                 return logger
-        if logger.fatal:
+        if logger.is_fatal:
             return logger
+        if self.git_root:
+            # Checking the repository can check out a branch, changing the files beneath it.
+            # Trial matches inside the repository are therefore not shared with any other check,
+            # which (unlike comparing paths) does not depend on how the paths were written.
+            probe_cache = {}
+
+        files, subdir_entries = listing if listing is not None else scan_directory(directory)
 
         # Check the files that this folder contains.
-        file_log = self.check_files(directory)
-        logger.include(file_log)
-        if logger.fatal:
+        if not (probe and logger.warnings):
+            file_log = self.check_files(directory, files=files, probe=probe)
+            logger.include(file_log)
+        if logger.is_fatal:
             return logger
 
         # Delegate further investigation down into subdirectories.
         # Handle non-variable-named directories.
-        for subdir in self.fixed_name_subdirs:
-            subdir_log = self.investigate_subdir(
-                directory / subdir.name,
-                subdir,
-                do_not_set_name=do_not_set_name,
-            )
+        for subdir_log in self._investigate_subdirs(
+            directory,
+            [(subdir.name, subdir) for subdir in self.fixed_name_subdirs],
+            subdir_entries,
+            do_not_set_name=do_not_set_name,
+            probe=probe,
+            probe_cache=probe_cache,
+        ):
             logger.include(subdir_log)
-            if logger.fatal:
+            if logger.is_fatal:
                 return logger
 
         # Determine which folders on the filesystem represent the subdirectories that have variable names.
-        matches, not_matched = self.match_variable_name_subdirs(directory)
-        not_matched_and_compulsory = [s for s in not_matched if not s.is_optional]
-        not_matched_and_optional = [s for s in not_matched if s.is_optional]
-        if matches:
+        matches, not_matched = self.match_variable_name_subdirs(
+            directory, subdir_entries=subdir_entries, probe_cache=probe_cache
+        )
+        not_matched_and_compulsory, not_matched_and_optional = [], []
+        for s in not_matched:
+            (not_matched_and_optional if s.is_optional else not_matched_and_compulsory).append(s)
+        if matches and not probe:
             logger.add_entry(
                 LogType.INFO_MATCHED_OPT_DIR_PATTERNS,
                 *[f"{subdir.name_pattern} -> {dir_name}" for dir_name, subdir in matches.items()],
@@ -343,25 +545,29 @@ class Directory:
                 *[s.name_pattern for s in not_matched_and_compulsory],
             )
             return logger
-        if not_matched_and_optional:
+        if not_matched_and_optional and not probe:
             logger.add_entry(
                 LogType.INFO_OPTONAL_DIR_VARIABLE_NAME_NOT_FOUND,
                 *[s.name_pattern for s in not_matched_and_optional],
             )
         # Then, actually go into these directories to continue the checking and logging.
-        for path, subdir in matches.items():
-            subdir_log = self.investigate_subdir(
-                directory / path,
-                subdir,
-                do_not_set_name=do_not_set_name,
-            )
+        for subdir_log in self._investigate_subdirs(
+            directory,
+            list(matches.items()),
+            subdir_entries,
+            do_not_set_name=do_not_set_name,
+            probe=probe,
+            probe_cache=probe_cache,
+        ):
             logger.include(subdir_log)
-            if logger.fatal:
+            if logger.is_fatal:
                 return logger
 
         return logger
 
-    def check_files(self, directory: Path) -> Logger:
+    def check_files(
+        self, directory: Path, *, files: Optional[Set[str]] = None, probe: bool = False
+    ) -> Logger:
         """
         Check the files that are present in the directory, returning a `Logger` whose entries
         provide the following WARNINGS and INFORMATION:
@@ -371,40 +577,46 @@ class Directory:
         3. (INFORMATION) A list of optional files that were found.
 
         :param directory: The directory on the file system to compare this instance to.
+        :param files: Names of the files in `directory`, if it has already been listed.
+        :param probe: Do not report optional files that were found (see `check_against_directory`).
         """
         logger = Logger(current_directory=directory)
 
-        files = set(f for f in os.listdir(directory) if os.path.isfile(directory / f))
-
-        missing_compulsory = set(self.compulsory) - files
-
-        data_files = set(
-            file for pattern in self.data_file_patterns for file in fnmatch.filter(files, pattern)
-        )
-        unexpected = files - set(self.compulsory) - set(self.optional) - data_files
-        git_files = set()
-        if self.git_root:
-            # Do not report git files as unexpected if we're at the git root.
-            # Add these as optionals
-            for file in unexpected:
-                if any(
-                    fnmatch.fnmatch(file.lower(), pattern.lower()) for pattern in GIT_ROOT_PATTERNS
-                ):
-                    git_files.add(file)
-
-            unexpected = unexpected - git_files
-
-        optional = (files - unexpected - set(self.compulsory)).union(git_files)
+        if files is None:
+            files, _ = scan_directory(directory)
+
+        missing_compulsory = self._compulsory_set - files
+
+        # Sort the remaining files into those that were expected (optional or data files,
+        # or git files if we're at the git root), and those that were not, in a single pass.
+        optional, unexpected = set(), set()
+        for file in files:
+            if file in self._compulsory_set:
+                continue
+            elif (
+                file in self._optional_set
+                or (self._data_regex is not None and self._data_regex.match(os.path.normcase(file)))
+                or (self.git_root and GIT_ROOT_REGEX.match(file))
+            ):
+                optional.add(file)
+            else:
+                unexpected.add(file)
 
         if missing_compulsory:
             logger.add_entry(LogType.WARN_FILE_NOT_FOUND, *missing_compulsory)
         if unexpected:
             logger.add_entry(LogType.WARN_UNEXPECTED_FILE, *unexpected)
-        if optional:
+        if optional and not probe:
             logger.add_entry(LogType.INFO_FOUND_OPTIONAL_FILE, *optional)
         return logger
 
-    def check_git_repo(self, directory: Path, *allowable_other_branches: str) -> LogEntry:
+    def check_git_repo(
+        self,
+        directory: Path,
+        *allowable_other_branches: str,
+        probe: bool = False,
+        entry_names: Optional[Collection[str]] = None,
+    ) -> LogEntry:
         """
         Check whether the `directory` on the filesystem is (or is not) a git repository, as expected by the instance.
 
@@ -425,38 +637,47 @@ class Directory:
 
         :param directory: The directory on the file system to compare this instance to.
         :param allowable_other_branches: Branch names that, if `main` is not present in the expected git repository, may be used instead.
+        :param probe: Do not check the state of the working tree, as is sufficient when trialling
+        matches. The marking branch is still checked out, so that trials see the files that will be
+        marked. Trialled folders that are matched have their working tree checked later.
+        :param entry_names: Names of the files and folders in `directory`, if it has already been listed.
+        A repository is only looked for if these include one of the `GIT_REPO_MARKERS`.
         """
         warning_info = None
-        i_am_a_git_repo = is_git_repo(directory)
+        # A listed folder can only be a repository if it contains one of the markers
+        may_be_repo = entry_names is None or not GIT_REPO_MARKERS.isdisjoint(entry_names)
 
         if self.git_root:
-            if not i_am_a_git_repo:
+            # Open the repository once, rather than checking for it and then opening it
+            repo = open_repo(directory)
+            if repo is None:
                 return LogEntry(
                     LogType.FATAL_NO_GIT_REPO,
                     where=directory,
                 )
 
-            repo = git.Repo(directory)
-
-            # Check working tree, and catch errors before trying checkout
-            untracked_files, unstaged_files, uncommitted_files = is_clean(repo)
-            working_tree_error, wt_content = None, None
-            if untracked_files:
-                working_tree_error = LogType.FATAL_GIT_UNTRACKED
-                wt_content = untracked_files
-            elif unstaged_files:
-                working_tree_error = LogType.FATAL_GIT_UNSTAGED
-                wt_content = unstaged_files
-            elif uncommitted_files:
-                working_tree_error = LogType.FATAL_GIT_UNCOMMITTED
-                wt_content = uncommitted_files
-            if working_tree_error:
-                return LogEntry(working_tree_error, where=directory, content=wt_content)
-
-            # Switch to marking branch
-            warning_info = switch_to_main_if_possible(repo, *allowable_other_branches)
-            repo.close()
-        elif i_am_a_git_repo:  # === (not self.git_repo and i_am_a_git_repo)
+            # The repository is released however we leave this block
+            with repo:
+                # Check working tree, and catch errors before trying checkout
+                if not probe:
+                    untracked_files, unstaged_files, uncommitted_files = is_clean(repo)
+                    working_tree_error, wt_content = None, None
+                    if untracked_files:
+                        working_tree_error = LogType.FATAL_GIT_UNTRACKED
+                        wt_content = untracked_files
+                    elif unstaged_files:
+                        working_tree_error = LogType.FATAL_GIT_UNSTAGED
+                        wt_content = unstaged_files
+                    elif uncommitted_files:
+                        working_tree_error = LogType.FATAL_GIT_UNCOMMITTED
+                        wt_content = uncommitted_files
+                    if working_tree_error:
+                        return LogEntry(working_tree_error, where=directory, content=wt_content)
+
+                # Switch to marking branch
+                warning_info = switch_to_main_if_possible(repo, *allowable_other_branches)
+        elif may_be_repo and is_git_repo(directory):
+            # === (not self.git_root and a repository is present)
             return LogEntry(LogType.FATAL_GIT_EXTRA_REPO, where=directory)
 
         return warning_info
@@ -481,9 +702,9 @@ class Directory:
             return directory_name == self.name
         else:
             # Must match shell expression.
-            if fnmatch.fnmatch(directory_name, self.name_pattern):
-                if not do_not_set_name:
-                    self.name = directory_name
+            if self._name_regex.match(os.path.normcase(directory_name)):
+                if not do_not_set_name and directory_name != self.name:
+                    self._rename(directory_name)
                 return True
             else:
                 return False
@@ -493,6 +714,11 @@ class Directory:
         path_to_subdir: Path,
         subdir: Directory,
         do_not_set_name: bool = False,
+        *,
+        subdir_entry: Optional[os.DirEntry] = None,
+        known_dir: bool = False,
+        probe: bool = False,
+        probe_cache: Optional[ProbeCache] = None,
     ) -> Logger:
         """
         Essentially wraps check_directory when called on a subdirectory on the instance, returning a `Logger`
@@ -512,12 +738,22 @@ class Directory:
         :param path_to_subdir: Path to folder on the filesystem to compare to.
         :param subdir: Subdirectory of the instance to compare to.
         :param do_not_set_name: See `check_against_directory`.
+        :param subdir_entry: The entry for `path_to_subdir` from listing its parent, if available.
+        :param known_dir: The parent of `path_to_subdir` has been listed, so `path_to_subdir` is a
+        folder exactly when `subdir_entry` is provided, and the filesystem need not be checked.
+        :param probe: See `check_against_directory`.
+        :param probe_cache: See `check_against_directory`.
         """
         logger = Logger(current_directory=path_to_subdir.parent)
 
-        if not path_to_subdir.is_dir():
+        if subdir_entry is not None:
+            is_dir = subdir_entry.is_dir()
+        else:
+            is_dir = not known_dir and path_to_subdir.is_dir()
+        if not is_dir:
             if subdir.is_optional:
-                logger.add_entry(LogType.INFO_OPTIONAL_DIR_NOT_FOUND, subdir.name)
+                if not probe:
+                    logger.add_entry(LogType.INFO_OPTIONAL_DIR_NOT_FOUND, subdir.name)
                 return logger
             else:
                 logger.add_entry(LogType.FATAL_NO_COMP_SUBDIR_MATCH_FIXED, subdir.name)
@@ -527,12 +763,19 @@ class Directory:
         subdir_log = subdir.check_against_directory(
             path_to_subdir,
             do_not_set_name=do_not_set_name,
+            directory_entry=subdir_entry,
+            probe=probe,
+            probe_cache=probe_cache,
         )
         logger.include(subdir_log)
         return logger
 
     def match_variable_name_subdirs(
-        self, directory: Path
+        self,
+        directory: Path,
+        *,
+        subdir_entries: Optional[Dict[str, os.DirEntry]] = None,
+        probe_cache: Optional[ProbeCache] = None,
     ) -> Tuple[Dict[str, Directory], List[Directory]]:
         """
         Handles cases where an instance has (potentially multiple) subdirectories
@@ -548,13 +791,23 @@ class Directory:
         2. A list of Directories in self.subdirs that were not matched to directories on the filesystem.
 
         Note that the second return value potentially includes optional subdirectories.
+
+        :param directory: The directory on the file system to compare this instance to.
+        :param subdir_entries: The folders in `directory`, by name, if it has already been listed.
+        :param probe_cache: See `check_against_directory`.
         """
-        possible_names = [
-            subdir
-            for subdir in os.listdir(directory)
-            if os.path.isdir(directory / subdir)
-            and subdir not in [fixed.name for fixed in self.fixed_name_subdirs]
-        ]
+        if not self.variable_name_subdirs:
+            # Nothing to match, so avoid listing the directory at all.
+            return {}, []
+        if probe_cache is None:
+            probe_cache = {}
+
+        if subdir_entries is None:
+            _, subdir_entries = scan_directory(directory)
+        possible_names = [name for name in subdir_entries if name not in self._fixed_names]
+        # Each candidate is tried against every variable-named subdirectory,
+        # so build the paths to them once.
+        candidate_paths = {name: directory / name for name in possible_names}
         matches = {}
         not_matched = []
 
@@ -568,10 +821,24 @@ class Directory:
             compatible_directories: List[str] = []
             compatible_directories_with_warnings: List[str] = []
             for pos_name in possible_names:
-                dir_log = subdir.check_against_directory(directory / pos_name, do_not_set_name=True)
-                if (not dir_log.fatal) and (not dir_log.warnings):
+                # Trial matches do not change the Directory, so their outcome can be reused.
+                # In particular, the same trials are repeated when a Directory matched by a
+                # trial is later checked properly.
+                # Keyed on the path as a string, which is cheaper to hash than a Path.
+                probe_key = (id(subdir), subdir_entries[pos_name].path)
+                dir_log = probe_cache.get(probe_key)
+                if dir_log is None:
+                    dir_log = subdir.check_against_directory(
+                        candidate_paths[pos_name],
+                        do_not_set_name=True,
+                        directory_entry=subdir_entries[pos_name],
+                        probe=True,
+                        probe_cache=probe_cache,
+                    )
+                    probe_cache[probe_key] = dir_log
+                if (not dir_log.is_fatal) and (not dir_log.warnings):
                     compatible_directories.append(pos_name)
-                if not dir_log.fatal:
+                if not dir_log.is_fatal:
                     compatible_directories_with_warnings.append(pos_name)
 
             if subdir.is_optional:
@@ -615,14 +882,15 @@ class Directory:
                     **possible_matches_optional_with_warnings,
                 }
             )
+        # Mappings are keyed by subdir.name, so we need to be able to recover the subdir itself.
+        # Subdirectory names are unique, as they are keys of the specification.
+        subdirs_by_name = {subdir.name: subdir for subdir in self.variable_name_subdirs}
         # If we don't have a mapping at this point, we're doomed.
         if all_are_mapped:
             # all_are_mapped maps subdir.name to a directory.
             # We need to flip this association and also provide subdir itself as the value.
             for subdir_name, matched_directory in all_are_mapped.items():
-                matches[matched_directory] = [
-                    subdir for subdir in self.variable_name_subdirs if subdir.name == subdir_name
-                ][0]
+                matches[matched_directory] = subdirs_by_name[subdir_name]
         else:
             # We could not map all compulsory + optional subdirectories with variable names.
             # However, we can at least try to map the compulsory ones.
@@ -631,12 +899,8 @@ class Directory:
             compulsory_are_matched = match_to_unique_assignments(possible_matches_compulsory)
             if compulsory_are_matched:
                 for subdir_name, matched_directory in compulsory_are_matched.items():
-                    matches[matched_directory] = [
-                        subdir
-                        for subdir in self.variable_name_subdirs
-                        if subdir.name == subdir_name
-                    ][0]
+                    matches[matched_directory] = subdirs_by_name[subdir_name]
             else:
-                not_matched = self.variable_name_subdirs
+                not_matched = list(self.variable_name_subdirs)
 
         return matches, not_matched
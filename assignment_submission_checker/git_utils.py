@@ -1,11 +1,18 @@
+from __future__ import annotations
+
 import os
+import re
+import subprocess
 from pathlib import Path
-from typing import List, Tuple
-
-import git
+from typing import TYPE_CHECKING, List, Tuple
 
 from assignment_submission_checker.logging.log_entry import LogEntry
 from assignment_submission_checker.logging.log_types import LogType
+from assignment_submission_checker.utils import compile_shell_patterns
+
+if TYPE_CHECKING:
+    # GitPython is slow to import, so is only imported by the functions that need it.
+    import git
 
 GIT_ROOT_PATTERNS = [
     "README*",
@@ -15,34 +22,81 @@ GIT_ROOT_PATTERNS = [
     "*.yaml",
     ".gitignore",
 ]
+# Case-insensitive expression matching any of the GIT_ROOT_PATTERNS
+GIT_ROOT_REGEX = compile_shell_patterns(GIT_ROOT_PATTERNS, flags=re.IGNORECASE)
+
+# A directory can only be a repository if it contains one of these entries:
+# a ".git" folder (or file, for worktrees and submodules), or a "HEAD" file for a bare repository.
+GIT_REPO_MARKERS = frozenset((".git", "HEAD"))
+
+# Captures the final component of a remote URL (or path), less any ".git" suffix
+REPO_NAME_REGEX = re.compile(r"([^/:]*?)(?:\.git)?/*$")
+
+# Number of space-separated fields in each type of `git status --porcelain=v2` entry
+# that describes a changed tracked file (ordinary, renamed/copied, and unmerged).
+PORCELAIN_V2_N_FIELDS = {"1": 9, "2": 10, "u": 11}
+
+# Directories that cannot contain a submitted repository, and are not descended into
+# when searching a directory tree for one.
+REPO_SEARCH_SKIP_DIRS = frozenset(
+    {".git", "__pycache__", ".mypy_cache", ".pytest_cache", "node_modules", ".venv"}
+)
 
 
 def clone_and_fetch_all_refs(clone_url: str, clone_into: Path) -> str:
     """
     Clone a remote repository from the `clone_url` provided, into the `clone_into` location.
 
+    The clone is a partial (blobless) clone, so only the file content of the default branch is
+    downloaded up-front; content for other branches is fetched if they are checked out.
+    A local branch is created for every branch on the remote, without checking it out.
+    These are not set up to track their remote counterparts.
+
     Method returns the name of the remote repository that was fetched, if it can be inferred.
     """
-    r = git.Repo.clone_from(clone_url, to_path=clone_into)
-
-    # Make sure we capture all branches from the remote
-    default_branch = r.head
-    for ref in r.remote().refs:
-        r.git.checkout(ref.name.split("/")[-1])
+    import git
 
-    # Leave on the default branch
-    r.git.checkout(default_branch)
-    repo_name = infer_repo_name(r)
-    r.close()
+    # Only git commands are needed, so no (comparatively expensive) Repo object is created.
+    git.Git().clone("--filter=blob:none", clone_url, str(clone_into))
+    repo = git.Git(clone_into)
 
-    return repo_name
-
-
-def infer_repo_name(repo: git.Repo) -> str:
+    # Make sure we capture all branches from the remote.
+    # All the missing local branches are created in a single transaction.
+    local_branches = set(repo.for_each_ref("--format=%(refname:short)", "refs/heads/").split())
+    remote_branches = repo.for_each_ref(
+        "--format=%(refname:lstrip=3) %(objectname)", "refs/remotes/origin/"
+    )
+    ref_updates = "".join(
+        f"create refs/heads/{branch} {commit}\n"
+        for branch, commit in map(str.split, remote_branches.splitlines())
+        if branch != "HEAD" and branch not in local_branches
+    )
+    if ref_updates:
+        # GitPython only reads a command's input from a file, so git is run directly here,
+        # but with GitPython's environment, and failing with the same error as the commands above.
+        update_refs = [git.Git.GIT_PYTHON_GIT_EXECUTABLE, "update-ref", "--stdin"]
+        try:
+            subprocess.run(
+                update_refs,
+                input=ref_updates,
+                text=True,
+                cwd=clone_into,
+                env={**os.environ, **repo.environment()},
+                check=True,
+                capture_output=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise git.GitCommandError(update_refs, e.returncode, e.stderr, e.stdout) from e
+    return repo_name_from_url(clone_url)
+
+
+def repo_name_from_url(url: str) -> str:
     """
-    Attempt to infer the name of a repository cloned from GitHub.
+    Infer the name of a repository from the URL (or path) it is cloned from.
+
+    EG, both ``https://github.com/org/repo.git`` and ``git@github.com:org/repo.git`` give ``repo``.
     """
-    return repo.remotes.origin.url.split(".git")[0].split("/")[-1]
+    return REPO_NAME_REGEX.search(url).group(1)
 
 
 def is_clean(
@@ -51,9 +105,13 @@ def is_clean(
     """
     Determine if the repository has a clean working tree.
 
-    Returns a Tuple of two values;
+    The state of the working tree is read from a single call to
+    ``git status --porcelain=v2 -z --untracked-files=all``.
+
+    Returns a Tuple of three values;
         1. A list of the untracked files in the repository.
-        2. A list of the changed files in the repository.
+        2. A list of the files with unstaged changes in the repository.
+        3. A list of the files with staged, but uncommitted, changes in the repository.
 
     In the event that boolean_output is True, instead just returns True/False if the repository
     is clean/unclean.
@@ -62,14 +120,27 @@ def is_clean(
     unstaged_files = []
     uncommitted_files = []
 
-    repo_clean = not repo.is_dirty(untracked_files=True)
-
-    if not repo_clean:
-        untracked_files = repo.untracked_files
-        unstaged_files = [item.a_path for item in repo.index.diff(None)]
-        uncommitted_files = [item.a_path for item in repo.index.diff("HEAD")]
-
-    return untracked_files, unstaged_files, uncommitted_files if not boolean_output else repo_clean
+    records = iter(repo.git.status("--porcelain=v2", "-z", "--untracked-files=all").split("\0"))
+    for record in records:
+        entry_type = record[:1]
+        if entry_type == "?":
+            untracked_files.append(record[2:])
+        elif entry_type in PORCELAIN_V2_N_FIELDS:
+            fields = record.split(" ", PORCELAIN_V2_N_FIELDS[entry_type] - 1)
+            staged_status, unstaged_status = fields[1]
+            path = fields[-1]
+            if entry_type == "2":
+                # Renamed or copied entries are followed by their original path
+                next(records, None)
+
+            if staged_status != ".":
+                uncommitted_files.append(path)
+            if unstaged_status != ".":
+                unstaged_files.append(path)
+
+    if boolean_output:
+        return not (untracked_files or unstaged_files or uncommitted_files)
+    return untracked_files, unstaged_files, uncommitted_files
 
 
 def is_git_repo(git_root_dir: Path) -> bool:
@@ -77,11 +148,10 @@ def is_git_repo(git_root_dir: Path) -> bool:
     Returns True if a valid git repository is found at the directory provided,
     and False otherwise.
     """
-    try:
-        repo = git.Repo(git_root_dir)
-        repo.close()
-    except Exception:
+    repo = open_repo(git_root_dir)
+    if repo is None:
         return False
+    repo.close()
     return True
 
 
@@ -90,26 +160,49 @@ def locate_repo_in_tree(search_root: Path) -> Path:
     Given a root folder to search from, recurse through the directory tree from this location and return the path to
     the first git repository that is found.
 
+    The tree is searched depth-first, using a single `os.scandir` pass per directory.
+    Folders in `REPO_SEARCH_SKIP_DIRS` (such as `.git`) are never descended into.
+
     If no repository is found, the return value is None.
     """
-    search_root = Path(search_root)
+    stack = [str(search_root)]
+    while stack:
+        directory = stack.pop()
+        if is_git_repo(directory):
+            return Path(directory)
 
-    try:
-        r = git.Repo(search_root)
-    except git.InvalidGitRepositoryError:
-        r = None
-
-    if r is not None:
-        r.close()
-        return search_root
-    else:
         # This directory is not a valid git repository,
-        # start recursing.
-        for dir in [search_root / p for p in os.listdir(search_root)]:
-            if dir.is_dir():
-                answer = locate_repo_in_tree(dir)
-            if answer is not None:
-                return answer
+        # queue its subdirectories (in listing order) to be searched next.
+        with os.scandir(directory) as entries:
+            subdirs = [
+                e.path
+                for e in entries
+                if e.is_dir(follow_symlinks=False) and e.name not in REPO_SEARCH_SKIP_DIRS
+            ]
+        stack.extend(reversed(subdirs))
+    return None
+
+
+def open_repo(git_root_dir: Path) -> git.Repo | None:
+    """
+    Returns the git repository found at the directory provided,
+    or None if there is no valid repository there.
+
+    The caller is responsible for closing the returned repository,
+    EG by using it as a context manager.
+
+    Most directories that are checked are not repositories, so GitPython is only consulted
+    if the directory contains one of the `GIT_REPO_MARKERS`.
+    """
+    if not any(os.path.lexists(os.path.join(git_root_dir, m)) for m in GIT_REPO_MARKERS):
+        return None
+
+    import git
+
+    try:
+        return git.Repo(git_root_dir)
+    except Exception:
+        return None
 
 
 def switch_if_safe(repo: git.Repo, to_branch: str, create: bool = False) -> None:
@@ -121,7 +214,7 @@ def switch_if_safe(repo: git.Repo, to_branch: str, create: bool = False) -> None
     """
     if repo.active_branch.name == to_branch:
         return
-    elif to_branch in [ref.name for ref in repo.references]:
+    elif to_branch in {ref.name for ref in repo.references}:
         repo.git.switch(to_branch)
     elif create:
         repo.git.switch("-c", to_branch)
@@ -145,19 +238,22 @@ def switch_to_main_if_possible(repo: git.Repo, *allowable_other_names: str) -> L
     - If the repository has no `main` branch, but did have a branch corresponding to
     one of the `allowable_other_names`.
     """
+    if repo.active_branch.name == "main":
+        return
+
     correct_ref = None
     warning_type = LogType.WARN
-    where = repo.git.rev_parse("--show-toplevel")
+    # Read from the repository object, rather than asking git (in a subprocess)
+    where = repo.working_tree_dir
 
-    if repo.active_branch.name == "main":
-        return
-    elif "main" in [r.name for r in repo.references]:
+    reference_names = {r.name for r in repo.references}
+    if "main" in reference_names:
         warning_type = LogType.WARN_GIT_NOT_ON_MAIN
         correct_ref = "main"
     else:
         # Attempt to switch to any of the other available references.
         for name in allowable_other_names:
-            if name in repo.references:
+            if name in reference_names:
                 warning_type = LogType.WARN_GIT_USES_MAIN_ALT
                 correct_ref = name
                 break
@@ -69,8 +69,10 @@ class LogEntry:
         Strips whitespace, removes duplicates, and sorts `self.content` into alphabetical order.
 
         Note that duplicates are removed after stripping whitespace.
+        Content that is empty (as it is for many entry types) is left as it is.
         """
-        self.content = sorted(set(text.strip() for text in self.content))
+        if self.content:
+            self.content = sorted(set(text.strip() for text in self.content))
 
     def _same_reference(self, other: LogEntry) -> bool:
         """
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from fnmatch import fnmatch
+import os
 from pathlib import Path
 from typing import Iterable, List, Optional
 
 from assignment_submission_checker.logging.log_entry import LogEntry
 from assignment_submission_checker.logging.log_types import LogType
+from assignment_submission_checker.utils import compile_shell_patterns
 
 
 def heading(text: str, pad_above: int = 1) -> str:
@@ -30,6 +31,7 @@ class Logger:
     """
 
     _current_directory: str
+    _n_fatal: int
     entries: List[LogEntry]
 
     @property
@@ -56,6 +58,15 @@ class Logger:
         """
         return [e for e in self.entries if e.log_type.is_fatal]
 
+    @property
+    def is_fatal(self) -> bool:
+        """
+        Whether the instance contains at least one FATAL entry.
+
+        Unlike `fatal`, this does not need to scan all entries in the instance.
+        """
+        return self._n_fatal > 0
+
     @property
     def information(self) -> List[LogEntry]:
         """
@@ -79,6 +90,7 @@ class Logger:
         if not all(isinstance(e, LogEntry) for e in entries):
             raise ValueError("Pre-populated entries provided must be of type LogEntry")
         self.entries = list(entries)
+        self._n_fatal = sum(e.log_type.is_fatal for e in self.entries)
 
     def add_entry(self, log_type: LogEntry | LogType, *content: str, **kwargs) -> None:
         """
@@ -90,9 +102,11 @@ class Logger:
             kwargs["where"] = self.current_directory
 
         if isinstance(log_type, LogEntry):
-            self.entries.append(log_type)
+            entry = log_type
         else:
-            self.entries.append(LogEntry(log_type=log_type, content=content, **kwargs))
+            entry = LogEntry(log_type=log_type, content=content, **kwargs)
+        self.entries.append(entry)
+        self._n_fatal += entry.log_type.is_fatal
 
     def ignore_unexpected_files(
         self,
@@ -106,22 +120,29 @@ class Logger:
         If a warning is left reporting no missing files, it is removed from the list of entries entirely.
         The return value of this function is a list of these (unedited) entries.
 
+        The patterns are compiled into a single regular expression up-front, so each file is
+        checked against all patterns with one match.
+
         :param relative_to: Shell expressions are considered relative to the given directory.
         :param ignore_patterns: Shell expressions to match to file names.
         """
+        # Names are normalised as fnmatch.fnmatch would, before matching.
+        ignore_regex = compile_shell_patterns(os.path.normcase(p) for p in ignore_patterns)
+        if ignore_regex is None:
+            return []
+
         flag_for_removal = []
         for i, entry in enumerate(self.entries):
             if entry.log_type == LogType.WARN_UNEXPECTED_FILE:
                 # Filter out ignore patterns, relative to given directory if necessary.
                 where = entry.where.relative_to(relative_to) if relative_to else entry.where
+                # The location is common to all the files in the entry, so is only converted once.
+                # normcase acts character-by-character, so can be applied to the parts separately.
+                prefix = os.path.normcase(f"{where}/")
                 new_content = [
                     file
-                    for file in entry.content
-                    if not any(
-                        fnmatch(f"{str(where)}/{file.strip()}", pattern)
-                        for pattern in ignore_patterns
-                    )
-                    and file.strip()
+                    for file, stripped in ((f, f.strip()) for f in entry.content)
+                    if stripped and not ignore_regex.match(prefix + os.path.normcase(stripped))
                 ]
                 # If there is no content left in the entry, flag it for removal
                 if not new_content:
@@ -148,6 +169,7 @@ class Logger:
         if not isinstance(other, Logger):
             raise TypeError(f"Can only include another Logger instance, not {type(other)}")
         self.entries.extend(other.entries)
+        self._n_fatal += other._n_fatal
 
     def parse(self, relative_to: Optional[Path] = None) -> str:
         """
@@ -159,7 +181,8 @@ class Logger:
 
         :param relative_to: Directory paths will be given relative to the given path, if provided.
         """
-        report_string = heading("Validation Report", pad_above=0)
+        # Collect the report in parts and join once, rather than growing a string.
+        report_parts = [heading("Validation Report", pad_above=0)]
 
         for log_type, heading_text in zip(
             ("fatal", "warnings", "information"),
@@ -167,8 +190,7 @@ class Logger:
         ):
             entries: List[LogEntry] = getattr(self, log_type)
             if entries:
-                report_string += heading(heading_text)
-                for entry in entries:
-                    report_string += entry.render(relative_to=relative_to)
+                report_parts.append(heading(heading_text))
+                report_parts.extend(entry.render(relative_to=relative_to) for entry in entries)
 
-        return report_string
+        return "".join(report_parts)
@@ -1,14 +1,61 @@
+import fnmatch
 import os
+import re
 import shutil
 import stat
-from copy import deepcopy
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
 from pathlib import Path
 from tempfile import mkdtemp
-from typing import Any, Callable, Dict, List, Optional, Set, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+if sys.platform == "linux":
+    import fcntl
 
 Obj = TypeVar("Object")
 Val = TypeVar("Value")
 
+# ioctl request code for cloning a file's data blocks (a "reflink") on Linux
+FICLONE = 0x40049409
+# Threads used for file system operations that are dominated by waiting on the disk,
+# rather than the CPU, so can usefully exceed the number of processors.
+# Pools of this size are never nested (their workers only do sequential work),
+# so this also bounds the number of threads each operation uses in total.
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def compile_shell_patterns(patterns: Iterable[str], flags: int = 0) -> Optional[re.Pattern]:
+    """
+    Compile a collection of shell expressions into a single regular expression.
+
+    A name matches the returned expression if ``fnmatch.fnmatchcase`` would match it to at least
+    one of the patterns, so checking a name against all of the patterns is a single regex match.
+    Note that, unlike ``fnmatch.fnmatch``, names are not passed through ``os.path.normcase``.
+
+    If no patterns are provided, None is returned.
+
+    :param patterns: Shell expressions to compile.
+    :param flags: Flags to pass to ``re.compile``, EG ``re.IGNORECASE``.
+    """
+    translated = [f"(?:{fnmatch.translate(pattern)})" for pattern in patterns]
+    if not translated:
+        return None
+    return re.compile("|".join(translated), flags)
+
 
 def copy_tree(
     src: Path,
@@ -20,6 +67,11 @@ def copy_tree(
 
     Returns the path to the copied tree.
 
+    Behaves like ``shutil.copytree(src, dest, symlinks=False, dirs_exist_ok=False)``, except that
+    the directory tree is created up-front and the files within it are copied concurrently by a
+    pool of worker threads. Directory metadata is copied last, so that read-only directories do
+    not prevent their contents from being written.
+
     :param src: Root directory whose tree should be copied.
     :param dest: Path to the copy destination.
     :param into: If True, then src will be copied into dest, under the name dest / src.stem, rather than directly to the destination location.
@@ -32,11 +84,79 @@ def copy_tree(
     if into:
         dest = dest / src.stem
 
-    shutil.copytree(src, dest, symlinks=False, dirs_exist_ok=False)
+    copied_dirs: List[Tuple[str, str]] = []
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as pool:
+        file_copies = []
+        to_copy = [(str(src), str(dest))]
+        while to_copy:
+            src_dir, dest_dir = to_copy.pop()
+            with os.scandir(src_dir) as entries:
+                entries = list(entries)
+            if not copied_dirs:
+                os.makedirs(dest_dir, exist_ok=False)
+            else:
+                os.mkdir(dest_dir)
+            copied_dirs.append((src_dir, dest_dir))
+
+            for entry in entries:
+                dest_path = os.path.join(dest_dir, entry.name)
+                if entry.is_dir():
+                    to_copy.append((entry.path, dest_path))
+                elif entry.is_file():
+                    file_copies.append(pool.submit(_copy_file, entry.path, dest_path))
+                else:
+                    # Opening special files (EG FIFOs) can block, whereas shutil refuses them
+                    file_copies.append(pool.submit(shutil.copy2, entry.path, dest_path))
+
+        # Propagate the first error encountered, if any
+        for copy in file_copies:
+            copy.result()
+
+    for src_dir, dest_dir in reversed(copied_dirs):
+        shutil.copystat(src_dir, dest_dir)
 
     return dest
 
 
+def _copy_file(src: str, dest: str) -> None:
+    """
+    Copies the file at ``src`` to ``dest``, along with its metadata, as ``shutil.copy2`` does.
+
+    On Linux, the copy is first attempted as a reflink (``FICLONE``), which on copy-on-write
+    filesystems (btrfs, XFS) shares the data blocks of ``src`` rather than copying them.
+    Otherwise, where ``os.copy_file_range`` is available, the file content is copied within the
+    kernel. If neither of these succeed, falls back to ``shutil.copy2``.
+
+    Hard links are never used, since changes to the copy (EG permissions) would then also be
+    made to the original submission.
+
+    ``src`` must be a regular file (or a link to one), since it is opened for reading.
+    Other files (EG FIFOs) should be passed to ``shutil.copy2`` directly.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as f_src, open(dest, "wb") as f_dest:
+                remaining = None
+                if sys.platform == "linux":
+                    try:
+                        fcntl.ioctl(f_dest.fileno(), FICLONE, f_src.fileno())
+                        remaining = 0
+                    except OSError:
+                        pass
+                if remaining is None:
+                    remaining = os.fstat(f_src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(f_src.fileno(), f_dest.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            shutil.copystat(src, dest)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dest)
+
+
 def match_to_unique_assignments(possible_mappings: Dict[Obj, Set[Val]]) -> Dict[Obj, Val]:
     """
     Given a set of objects, and possible assignments to a set of values for each object,
@@ -44,6 +164,11 @@ def match_to_unique_assignments(possible_mappings: Dict[Obj, Set[Val]]) -> Dict[
     options.
 
     If no such mapping is possible, the returned dictionary is empty.
+    Otherwise, the objects appear in the returned dictionary in the order they were provided.
+
+    The mapping is found as a maximum bipartite matching, by searching for augmenting paths
+    (Kuhn's algorithm). The values each object can take are held as a bitmask over all of the
+    values, so the values left to try for an object are found with integer operations.
 
     Example
     -------
@@ -55,98 +180,50 @@ def match_to_unique_assignments(possible_mappings: Dict[Obj, Set[Val]]) -> Dict[
     >>> match_to_unique_assigments(possible_mappings)
     {"a": 1, "b", 3, "c": 2}
     """
-    if possible_mappings:
-        pass
-    mappings = {}
-    for key, a_value in possible_mappings.items():
-        mappings[key] = set(a_value)
-    one_to_one = {}
-    unassigned_values = set().union(*mappings.values())
+    objects = list(possible_mappings.keys())
+    # Number the values, in the order they are first encountered.
+    value_index: Dict[Val, int] = {}
+    masks: List[int] = []
+    for obj in objects:
+        mask = 0
+        for value in possible_mappings[obj]:
+            mask |= 1 << value_index.setdefault(value, len(value_index))
+        if not mask:
+            # There is an object that does not have anything it can be mapped to.
+            return {}
+        masks.append(mask)
+    values = list(value_index.keys())
 
-    def value_can_be_assigned_to(value: Val, map: Dict[Obj, Set[Val]]) -> List[Obj]:
-        """
-        Return a list of objects that this value can be assigned to.
-        """
-        return [obj for obj, list_of_values in map.items() if value in list_of_values]
+    # owner[v] is the index of the object that value v is currently assigned to, or -1.
+    owner = [-1] * len(values)
+    visited = 0
 
-    def remove_value_from_all_mappings(value: Val, map: Dict[Obj, Set[Val]]) -> None:
+    def assign(obj: int) -> bool:
         """
-        Removes a value from all lists in mappings, if it is there.
+        Attempt to assign a value to the object, reassigning other objects if necessary.
         """
-        for obj, list_of_values in map.items():
-            if value in list_of_values:
-                map[obj].remove(value)
-
-    while len(one_to_one) < len(possible_mappings):
-        # There is at least one object that does not have a value matched to it.
-        obj_to_assign = None
-        val_to_assign = None
-        if any([len(value_list) == 0 for value_list in mappings.values()]):
-            # There is at least one object that does not have anything it can be mapped to.
-            # Return the failure case.
+        nonlocal visited
+        candidates = masks[obj] & ~visited
+        while candidates:
+            lowest = candidates & -candidates
+            visited |= lowest
+            value = lowest.bit_length() - 1
+            if owner[value] < 0 or assign(owner[value]):
+                owner[value] = obj
+                return True
+            candidates = masks[obj] & ~visited
+        return False
+
+    for obj in range(len(objects)):
+        visited = 0
+        if not assign(obj):
             return {}
 
-        # If 1 value can only be assigned to a single object, make this assignment.
-        for a_value in unassigned_values:
-            possible_assignments = value_can_be_assigned_to(a_value, mappings)
-            if len(possible_assignments) == 1:
-                obj_to_assign = possible_assignments[0]
-                val_to_assign = a_value
-                break
-
-        if obj_to_assign is None:
-            # Previous loop failed to find any values that can only be mapped to
-            # one object.
-
-            # Instead, if any objects only have a single value they can take, we assign this now.
-            for obj, set_of_values in mappings.items():
-                if len(set_of_values) == 1:
-                    obj_to_assign = obj
-                    (val_to_assign,) = set_of_values
-                    break
-        if obj_to_assign is None:
-            # Failed to find any objects that can only take one value.
-            # Naively, our best approach now is to go through each object in sequence,
-            # and arbitrarily assign it to one of its values.
-            # Then, compute if a possible assignment solution still exists.
-            # If it does, make this assignment, otherwise retry with a different arbitrary assignment.
-            # If we exhaust all possible assignments in this way, there is no solution.
-            still_a_possible_solution = None
-            for obj in mappings.keys():
-                obj_to_assign = obj
-
-                for a_value in mappings[obj]:
-                    val_to_assign = a_value
-
-                    # Create a copy of mappings with this assignment having been made
-                    mappings_copy = deepcopy(mappings)
-                    remove_value_from_all_mappings(val_to_assign, mappings_copy)
-                    mappings_copy.pop(obj_to_assign, None)
-
-                    # Determine if a solution to the assignment remains
-                    still_a_possible_solution = match_to_unique_assignments(mappings_copy)
-
-                    if still_a_possible_solution:
-                        break
-                if still_a_possible_solution:
-                    break
-            if still_a_possible_solution:
-                # We have actually computed the solution, which we obtain from combining our
-                # existing one_to_one mappings with the solution we just received + our arbitrary
-                # assignment.
-                return {
-                    obj_to_assign: val_to_assign,
-                    **one_to_one,
-                    **still_a_possible_solution,
-                }
-            else:
-                return {}
-
-        # Having determined the object to assign, make the assignment
-        one_to_one[obj_to_assign] = val_to_assign
-        remove_value_from_all_mappings(val_to_assign, mappings)
-        mappings.pop(obj_to_assign, None)
-    return one_to_one
+    assigned_value = [0] * len(objects)
+    for value, obj in enumerate(owner):
+        if obj >= 0:
+            assigned_value[obj] = value
+    return {objects[obj]: values[value] for obj, value in enumerate(assigned_value)}
 
 
 def on_readonly_error(f: Callable[[Path], None], path: Path, exc_info) -> None:
@@ -163,16 +240,110 @@ def on_readonly_error(f: Callable[[Path], None], path: Path, exc_info) -> None:
     f(path)
 
 
+def remove_tree(root: Path, max_workers: int = MAX_IO_WORKERS) -> None:
+    """
+    Removes the directory tree beneath (and including) ``root``.
+
+    The tree is walked with ``os.scandir`` in post-order, unlinking files as they are listed and
+    removing directories once they are empty, so no full listing of the tree is ever built.
+    Symbolic links are removed, not followed.
+
+    The immediate children of ``root`` are removed concurrently by a pool of worker threads,
+    which overlaps the latency of the individual removals on slow (EG network) filesystems.
+
+    Entries that cannot be removed due to an access error (read only file) have write permission
+    added and are then removed again, as in ``on_readonly_error``.
+
+    :param root: Directory to remove.
+    :param max_workers: Maximum number of children of ``root`` to remove concurrently.
+    If 1, the tree is removed sequentially.
+    """
+    if max_workers > 1:
+        with os.scandir(root) as entries:
+            entries = list(entries)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Propagate the first error encountered, if any
+            for removal in [pool.submit(_remove_entry, entry) for entry in entries]:
+                removal.result()
+    else:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                _remove_entry(entry)
+    _remove_readonly_safe(os.rmdir, root)
+
+
+def _remove_entry(entry: os.DirEntry) -> None:
+    """
+    Removes the file, link, or (sequentially) the directory tree, that ``entry`` refers to.
+    """
+    if entry.is_dir(follow_symlinks=False):
+        remove_tree(entry.path, max_workers=1)
+    else:
+        _remove_readonly_safe(os.unlink, entry.path)
+
+
+def _remove_readonly_safe(f: Callable[[Path], None], path: Path) -> None:
+    """
+    Calls ``f(path)``, retrying via ``on_readonly_error`` if access to ``path`` is denied.
+    """
+    try:
+        f(path)
+    except PermissionError:
+        on_readonly_error(f, path, None)
+
+
+def remove_tree_in_background(root: Path) -> threading.Thread:
+    """
+    Removes the directory tree beneath (and including) ``root`` in a background thread,
+    returning the (started) thread.
+
+    The thread is not a daemon, so the interpreter will wait for the removal to finish
+    before exiting. The removal is sequential (``max_workers=1``), since once the interpreter
+    has started to exit, no new work can be given to a pool of worker threads.
+
+    :param root: Directory to remove.
+    """
+    cleaner = threading.Thread(
+        target=remove_tree, args=(root,), kwargs={"max_workers": 1}, name=f"remove_tree({root})"
+    )
+    cleaner.start()
+    return cleaner
+
+
+def scan_directory(directory: Path) -> Tuple[Set[str], Dict[str, os.DirEntry]]:
+    """
+    List the contents of a directory in a single pass, separating files from subdirectories.
+
+    Returns the names of the files in the directory, and a dictionary mapping the names of its
+    subdirectories to their ``os.DirEntry``, in the order they were listed.
+    The type of each entry is taken from the listing where possible, avoiding a stat call per entry.
+
+    :param directory: Directory to list the contents of.
+    """
+    files = set()
+    subdirs = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files.add(entry.name)
+            elif entry.is_dir():
+                subdirs[entry.name] = entry
+    return files, subdirs
+
+
 def provide_tmp_directory(
     clean_on_error: bool = True,
     clean_on_success: bool = True,
     pass_dir_as_arg: Optional[str] = None,
     where: Optional[Path] = None,
+    clean_in_background: bool = False,
 ) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
     """
     Wraps the execution of a function with the creation and optional tear-down of a
     temporary directory, that can be optionally passed to the wrapped function.
 
+    A fresh directory is provided (by `tmp_directory`) on every call to the wrapped function.
+
     :param clean_on_error: If True, the temporary directory that is created will be removed if
         the wrapped function raises an error.
     :param clean_on_success: If True, the temporary directory that is created will be removed
@@ -183,35 +354,69 @@ def provide_tmp_directory(
     :param where: If provided, this should be a path to a predefined location to use as the
         temporary directory. It must not currently exist on the filesystem, to ensure safety when
         deleting it.
+    :param clean_in_background: If True, the temporary directory is removed by a background
+        thread (see `remove_tree_in_background`), so the wrapped function returns without waiting
+        for the removal to finish.
     """
 
     def decorator(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
-        tmp_directory = None
-        if where is not None:
-            tmp_directory = where
-            if tmp_directory.exists():
-                raise RuntimeError(
-                    f"Will not use existing location ({where}) as a temporary directory."
-                )
-            tmp_directory.mkdir()
-        else:
-            tmp_directory = mkdtemp()
-
+        @wraps(func)
         def _inner(*args, **kwargs) -> Any:
-            return_val = None
-            try:
+            with tmp_directory(
+                clean_on_error=clean_on_error,
+                clean_on_success=clean_on_success,
+                where=where,
+                clean_in_background=clean_in_background,
+            ) as tmp_dir:
                 if pass_dir_as_arg:
-                    return_val = func(*args, **kwargs, **{pass_dir_as_arg: tmp_directory})
-                else:
-                    return_val = func(*args, **kwargs)
-            except Exception as e:
-                if clean_on_error:
-                    shutil.rmtree(tmp_directory, onerror=on_readonly_error)
-                raise e
-            if clean_on_success:
-                shutil.rmtree(tmp_directory, onerror=on_readonly_error)
-            return return_val
+                    return func(*args, **kwargs, **{pass_dir_as_arg: tmp_dir})
+                return func(*args, **kwargs)
 
         return _inner
 
     return decorator
+
+
+@contextmanager
+def tmp_directory(
+    clean_on_error: bool = True,
+    clean_on_success: bool = True,
+    where: Optional[Path] = None,
+    clean_in_background: bool = False,
+    prefix: Optional[str] = None,
+) -> Iterator[Path]:
+    """
+    Context manager that creates a temporary directory on entry, and optionally removes it on exit.
+
+    Usage : ``with tmp_directory() as tmp_dir:``
+
+    :param clean_on_error: If True, the temporary directory will be removed if the body of the
+        ``with`` block raises an error.
+    :param clean_on_success: If True, the temporary directory will be removed if the body of the
+        ``with`` block completes without raising an error.
+    :param where: If provided, this should be a path to a predefined location to use as the
+        temporary directory. It must not currently exist on the filesystem, to ensure safety when
+        deleting it.
+    :param clean_in_background: If True, the temporary directory is removed by a background
+        thread (see `remove_tree_in_background`), so exiting the block does not wait for the
+        removal to finish.
+    :param prefix: Prefix for the name of the temporary directory, if `where` is not provided.
+    """
+    if where is None:
+        tmp_dir = Path(mkdtemp(prefix=prefix))
+    elif where.exists():
+        raise RuntimeError(f"Will not use existing location ({where}) as a temporary directory.")
+    else:
+        where.mkdir()
+        tmp_dir = where
+
+    succeeded = False
+    try:
+        yield tmp_dir
+        succeeded = True
+    finally:
+        if clean_on_success if succeeded else clean_on_error:
+            if clean_in_background:
+                remove_tree_in_background(tmp_dir)
+            else:
+                remove_tree(tmp_dir)
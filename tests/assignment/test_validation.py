@@ -0,0 +1,36 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from assignment_submission_checker.assignment import Assignment
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="Symbolic links are not supported.")
+def test_validate_through_symlink(tmp_path: Path) -> None:
+    """
+    A submission given through a symbolic link is checked under the name it was given,
+    not the name of the folder that the link points to.
+    """
+    assignment = Assignment.from_json(
+        json_str=json.dumps(
+            {
+                "number": "9",
+                "year": 1994,
+                "structure": {"variable-name": "*-submission", "compulsory": ["a.py"]},
+            }
+        )
+    )
+    (tmp_path / "working-copy").mkdir()
+    (tmp_path / "working-copy" / "a.py").write_text("Placeholder content")
+    try:
+        (tmp_path / "my-submission").symlink_to(tmp_path / "working-copy")
+    except OSError:
+        pytest.skip("Cannot create symbolic links.")
+
+    report = assignment.validate_assignment(
+        submission_dir=tmp_path / "my-submission", tmp_dir=tmp_path / "validation"
+    )
+
+    assert "FATAL" not in report
@@ -0,0 +1,80 @@
+from pathlib import Path
+from typing import List, Optional
+
+import git
+import pytest
+
+from assignment_submission_checker.directory import Directory
+from assignment_submission_checker.logging.log_types import LogType
+
+REPOSITORIES = ["repo-a", "repo-b", "repo-c"]
+
+
+@pytest.fixture
+def sibling_repositories_directory() -> Directory:
+    return Directory(
+        "structure",
+        {
+            "variable-name": "*",
+            **{name: {"git-root": True, "compulsory": ["a.py"]} for name in REPOSITORIES},
+        },
+        parent=None,
+    )
+
+
+@pytest.mark.parametrize(
+    ["missing", "expected_log_types"],
+    [
+        pytest.param(
+            None,
+            [
+                LogType.INFO_MATCHED_DIR_NAME,
+                LogType.WARN_GIT_NOT_ON_MAIN,
+                LogType.WARN_GIT_NOT_ON_MAIN,
+                LogType.WARN_GIT_NOT_ON_MAIN,
+            ],
+            id="All repositories present",
+        ),
+        pytest.param(
+            "repo-b",
+            [
+                LogType.INFO_MATCHED_DIR_NAME,
+                LogType.WARN_GIT_NOT_ON_MAIN,
+                LogType.FATAL_NO_COMP_SUBDIR_MATCH_FIXED,
+            ],
+            id="Middle repository missing",
+        ),
+    ],
+)
+def test_sibling_repositories(
+    tmp_path: Path,
+    sibling_repositories_directory: Directory,
+    missing: Optional[str],
+    expected_log_types: List[LogType],
+) -> None:
+    """
+    Sibling repositories are reported in order, and nothing after a FATAL error is checked.
+    """
+    submission = tmp_path / "submission"
+    for name in REPOSITORIES:
+        if name == missing:
+            continue
+        (submission / name).mkdir(parents=True)
+        (submission / name / "a.py").write_text("Placeholder content")
+        with git.Repo.init(submission / name) as repo:
+            if repo.active_branch.name != "main":
+                repo.git.branch("-m", "main")
+            repo.git.add(".")
+            repo.git.commit("-m", "Commit all work.")
+            repo.git.checkout("-b", "draft")
+
+    logger = sibling_repositories_directory.check_against_directory(submission)
+
+    assert [entry.log_type for entry in logger.entries] == expected_log_types
+    assert [entry.where for entry in logger.warnings] == [
+        submission / name for name in REPOSITORIES[: len(logger.warnings)]
+    ]
+    if missing is not None:
+        # Repositories after the FATAL error were not checked, so are left as submitted.
+        with git.Repo(submission / "repo-c") as repo:
+            assert repo.active_branch.name == "draft"
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+import pytest
+
 from assignment_submission_checker.directory import Directory
 
 
@@ -16,6 +18,7 @@ def test_init(template_directory: Directory):
     assert not template_directory.data_file_patterns
     assert template_directory.variable_name
     assert template_directory.path_from_root == Path(".")
+    assert template_directory.contains_git_root
     assert len(template_directory.subdirs) == 1
 
     # Validate that we can fetch children via reference
@@ -36,6 +39,7 @@ def test_init(template_directory: Directory):
     ), "No compulsory files (nor subdirs to recurse into) should imply directory is optional"
     assert data_dir.path_from_root == Path(path_to_data)
     assert data_dir.parent is repo_directory
+    assert not data_dir.contains_git_root
 
 
 def test_traverse(template_directory: Directory) -> None:
@@ -48,3 +52,35 @@ def test_traverse(template_directory: Directory) -> None:
 
     for expected_name, dir in zip(expected_order, template_directory):
         assert expected_name == dir.name, "Out-of-order-iteration through file structure!"
+
+
+def test_walk(template_directory: Directory) -> None:
+    walked = list(template_directory.walk())
+
+    assert walked[0] is template_directory, "Walk did not start from the calling Directory."
+    assert sorted(d.name for d in walked) == sorted(d.name for d in template_directory)
+
+
+def test_path_from_root_follows_name_changes() -> None:
+    root = Directory("root", {"sub": {"variable-name": "s*", "inner": {"compulsory": ["a.py"]}}})
+    inner = root["sub/inner"]
+    assert inner.path_from_root == Path("sub/inner")
+
+    assert root["sub"].check_name("src")
+    assert inner.path_from_root == Path("src/inner")
+    assert root["src/inner"] is inner
+
+
+def test_getitem(template_directory: Directory) -> None:
+    repo_directory = template_directory["git-root-dir"]
+    data_dir = template_directory["git-root-dir/data"]
+
+    assert repo_directory["data"] is data_dir, "Lookups are not relative to the Directory."
+    assert data_dir[".."] is repo_directory
+    assert data_dir["../report"] is template_directory["git-root-dir/report"]
+    assert template_directory["."] is template_directory
+
+    with pytest.raises(ValueError):
+        template_directory["not-a-subdir"]
+    with pytest.raises(ValueError):
+        template_directory[".."]
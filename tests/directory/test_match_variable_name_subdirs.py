@@ -1,9 +1,12 @@
 from pathlib import Path
 from typing import Dict, List
 
+import git
 import pytest
 
 from assignment_submission_checker.directory import Directory
+from assignment_submission_checker.logging.log_types import LogType
+from assignment_submission_checker.logging.logger import Logger
 
 # TSTK: There are known bugs here - when dealing with two optional subdirectories that
 # can feasibly have the same structure when submitted, the method of assigning
@@ -111,3 +114,96 @@ def test_match_variable_names(
             a[f"matches-{i}"].name
             == directory_structure_for_variable_name_checking[f"nested-dir-{i}"].name
         ), f"Wrong directory matched to matches-{i}."
+
+
+@pytest.mark.parametrize(
+    ["make_folder_structure"],
+    [pytest.param("file_structure_matching_variable_names")],
+    indirect=["make_folder_structure"],
+)
+def test_match_variable_names_reuses_probes(
+    make_folder_structure,
+    tmp_path: Path,
+    directory_structure_for_variable_name_checking: Directory,
+) -> None:
+    probe_cache = {}
+    first_matches, _ = directory_structure_for_variable_name_checking.match_variable_name_subdirs(
+        tmp_path / "top-level-folder", probe_cache=probe_cache
+    )
+    assert probe_cache, "Trial matches were not recorded."
+
+    cached_logs = dict(probe_cache)
+    second_matches, _ = directory_structure_for_variable_name_checking.match_variable_name_subdirs(
+        tmp_path / "top-level-folder", probe_cache=probe_cache
+    )
+    assert first_matches == second_matches
+    assert all(
+        probe_cache[key] is log for key, log in cached_logs.items()
+    ), "Trial matches were repeated rather than reused."
+
+
+@pytest.mark.parametrize(
+    ["make_folder_structure", "setup_folder_structure_with_git"],
+    [
+        pytest.param(
+            "template_dir_dict",
+            {"rootdir": "top-level-folder/my-git-submission"},
+        )
+    ],
+    indirect=["make_folder_structure", "setup_folder_structure_with_git"],
+)
+def test_match_git_root_on_marking_branch(
+    setup_folder_structure_with_git,
+    tmp_path: Path,
+    template_directory: Directory,
+) -> None:
+    """
+    A variable-named git root should be matched against the marking branch,
+    not the branch the submission was left on.
+    """
+    repo = git.Repo(tmp_path / "top-level-folder" / "my-git-submission")
+    repo.git.checkout("-b", "draft")
+    repo.git.rm("-r", "report")
+    repo.git.commit("-m", "Remove the report on a branch that is not marked.")
+    repo.close()
+
+    logger = template_directory.check_against_directory(tmp_path / "top-level-folder")
+
+    assert not logger.is_fatal, "Submission was not checked on its marking branch."
+    assert LogType.FATAL_NO_COMP_SUBDIR_MATCH not in [entry.log_type for entry in logger.entries]
+
+
+@pytest.mark.parametrize("relative_root", [False, True])
+def test_repository_does_not_share_probes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, relative_root: bool
+) -> None:
+    """
+    Trials inside a repository made before its marking branch was checked out are not reused,
+    however the path to the repository is written.
+    """
+    repo_spec = Directory(
+        "repo", {"git-root": True, "source": {"variable-name": "*", "compulsory": ["a.py"]}}
+    )
+    (tmp_path / "repo" / "src").mkdir(parents=True)
+    (tmp_path / "repo" / "src" / "a.py").write_text("Placeholder content")
+    with git.Repo.init(tmp_path / "repo") as repo:
+        if repo.active_branch.name != "main":
+            repo.git.branch("-m", "main")
+        repo.git.add(".")
+        repo.git.commit("-m", "Commit all work.")
+        repo.git.checkout("-b", "draft")
+
+    # Stale trials, as if recorded before the checkout, under both spellings of the path.
+    stale_trial = Logger()
+    stale_trial.add_entry(LogType.FATAL_NOT_A_DIR, where=tmp_path / "repo" / "src")
+    probe_cache = {
+        (id(repo_spec["source"]), str(tmp_path / "repo" / "src")): stale_trial,
+        (id(repo_spec["source"]), str(Path("repo") / "src")): stale_trial,
+    }
+
+    monkeypatch.chdir(tmp_path)
+    root = Path("repo") if relative_root else tmp_path / "repo"
+    logger = repo_spec.check_against_directory(root, probe_cache=probe_cache)
+
+    assert not logger.is_fatal, "A stale trial match was reused."
+    assert LogType.INFO_MATCHED_OPT_DIR_PATTERNS in [entry.log_type for entry in logger.entries]
@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import List, Optional, Set
 
+import git
 import pytest
 
 from assignment_submission_checker.directory import Directory
@@ -239,6 +240,63 @@ def test_check_git_repo(
         assert git_log_entry is None
 
 
+@pytest.mark.parametrize(
+    [
+        "make_folder_structure",
+        "setup_folder_structure_with_git",
+        "setup_submission",
+        "expected_entry_type",
+    ],
+    [
+        pytest.param(
+            "template_dir_dict",
+            {"rootdir": "top-level-folder/my-git-submission"},
+            {"untracked": ["not_tracked.py"]},
+            None,
+            id="Untracked file is not checked.",
+        ),
+        pytest.param(
+            "template_dir_dict",
+            {"rootdir": "top-level-folder/my-git-submission"},
+            {"unstaged": ["c1.py"]},
+            None,
+            id="Unstaged file is not checked.",
+        ),
+        pytest.param(
+            "template_dir_dict",
+            {"rootdir": "top-level-folder/my-git-submission", "checkout": "flibble"},
+            {},
+            LogType.WARN_GIT_NOT_ON_MAIN,
+            id="Wrong branch is still checked out.",
+        ),
+    ],
+    indirect=[
+        "make_folder_structure",
+        "setup_folder_structure_with_git",
+        "setup_submission",
+    ],
+)
+def test_check_git_repo_probe(
+    setup_submission,
+    tmp_path: Path,
+    template_directory: Directory,
+    expected_entry_type: Optional[LogType],
+) -> None:
+    """
+    Probing skips checking the working tree, but still switches to the marking branch.
+    """
+    repo_dir = tmp_path / "top-level-folder" / "my-git-submission"
+
+    probe_entry = template_directory["git-root-dir"].check_git_repo(repo_dir, probe=True)
+
+    if expected_entry_type is not None:
+        assert probe_entry.log_type == expected_entry_type
+    else:
+        assert probe_entry is None
+    with git.Repo(repo_dir) as repo:
+        assert repo.active_branch.name == "main"
+
+
 @pytest.mark.parametrize(
     [
         "make_folder_structure",
@@ -358,3 +416,27 @@ def test_check_files(
         ), "Optional files were incorrectly identified."
     else:
         assert len(optional_files) == 0
+
+    # Probing reports the same WARNINGS, but no INFORMATION.
+    probe_logger = template_directory[subdir_to_check].check_files(tmp_path / dir_name, probe=True)
+    assert probe_logger.warnings == logger.warnings
+    assert not probe_logger.information
+
+
+@pytest.mark.parametrize("known_dir", [False, True])
+@pytest.mark.parametrize(
+    ["optional", "expected_log_type"],
+    [
+        pytest.param(False, LogType.FATAL_NO_COMP_SUBDIR_MATCH_FIXED, id="Compulsory"),
+        pytest.param(True, LogType.INFO_OPTIONAL_DIR_NOT_FOUND, id="Optional"),
+    ],
+)
+def test_investigate_missing_subdir(
+    tmp_path: Path, known_dir: bool, optional: bool, expected_log_type: LogType
+) -> None:
+    compulsory = [] if optional else ["README.md"]
+    parent = Directory("parent", {"missing": {"compulsory": compulsory}})
+
+    logger = parent.investigate_subdir(tmp_path / "missing", parent["missing"], known_dir=known_dir)
+
+    assert [entry.log_type for entry in logger.entries] == [expected_log_type]
@@ -0,0 +1,102 @@
+import io
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from assignment_submission_checker import __version__
+from assignment_submission_checker import cli as cli_module
+from assignment_submission_checker.cli import cli, version_requested
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        pytest.param(["--version"], id="--version"),
+        pytest.param(["-v"], id="-v"),
+        pytest.param(["-q", "--version", "assignment"], id="Among other arguments"),
+    ],
+)
+def test_version_without_positional_arguments(
+    argv: List[str], capsys: pytest.CaptureFixture
+) -> None:
+    with pytest.raises(SystemExit) as exit_info:
+        cli(argv)
+
+    assert exit_info.value.code == 0
+    captured = capsys.readouterr()
+    assert captured.out.rstrip("\n").endswith(f", {__version__}")
+    assert not captured.err, "Arguments were validated before answering the version request."
+
+
+@pytest.mark.parametrize(
+    ["argv", "expected"],
+    [
+        pytest.param(["--version"], True, id="--version"),
+        pytest.param(["assignment", "submission"], False, id="No flag"),
+        pytest.param(["--", "-v"], False, id="After --"),
+    ],
+)
+def test_version_requested(argv: List[str], expected: bool) -> None:
+    assert version_requested(argv) == expected
+
+
+@pytest.mark.parametrize(
+    ["quiet", "to_file"],
+    [
+        pytest.param(False, False, id="stdout"),
+        pytest.param(True, True, id="File"),
+        pytest.param(False, True, id="stdout and file"),
+    ],
+)
+def test_cli_writes_undecodable_names(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, quiet: bool, to_file: bool
+) -> None:
+    """
+    File names that could not be decoded are written back as the bytes they were read from.
+    """
+    report = "The following files were found, but not expected, in .:\n- caf\udce9.py\n"
+    monkeypatch.setattr(cli_module, "main", lambda **kwargs: report)
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="ascii", errors="surrogateescape")
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    spec_file = tmp_path / "spec.json"
+    spec_file.write_text("{}")
+    output_file = tmp_path / "report.txt"
+    argv = ["-l", str(spec_file), str(tmp_path)]
+    if quiet:
+        argv.append("-q")
+    if to_file:
+        argv.extend(["-o", str(output_file)])
+
+    with pytest.warns(UserWarning), pytest.raises(SystemExit) as exit_info:
+        cli(argv)
+
+    assert exit_info.value.code == 0
+    expected = b"The following files were found, but not expected, in .:\n- caf\xe9.py\n"
+    stdout.flush()
+    assert stdout.buffer.getvalue() == (b"" if quiet else expected)
+    if to_file:
+        assert output_file.read_bytes() == expected
+
+
+def test_cli_translates_line_endings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Where lines do not end in "\\n", the report is written through stdout's text layer,
+    which translates the line endings.
+    """
+    monkeypatch.setattr(cli_module, "main", lambda **kwargs: "Validation Report\n")
+    monkeypatch.setattr(os, "linesep", "\r\n")
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", newline="\r\n")
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    spec_file = tmp_path / "spec.json"
+    spec_file.write_text("{}")
+
+    with pytest.warns(UserWarning), pytest.raises(SystemExit):
+        cli(["-l", str(spec_file), str(tmp_path)])
+
+    stdout.flush()
+    assert stdout.buffer.getvalue() == b"Validation Report\r\n"
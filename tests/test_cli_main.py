@@ -0,0 +1,120 @@
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Dict, Generator, List
+
+import pytest
+
+from assignment_submission_checker import cli_main
+from assignment_submission_checker.cli_main import fetch_spec
+
+SPEC_NAME = "1994-09"
+SPEC_CONTENT = '{"number": "9", "year": 1994, "structure": {}}'
+SPEC_ETAG = '"spec-version-1"'
+# Redirects to SPEC_NAME, as GitHub does when a repository is renamed or transferred
+MOVED_SPEC_NAME = "1994-09-moved"
+
+
+class SpecRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves SPEC_CONTENT at /<SPEC_NAME>.json, honouring If-None-Match,
+    redirects /<MOVED_SPEC_NAME>.json there,
+    and records the headers of every request that it receives.
+    """
+
+    requests: List[Dict[str, str]] = []
+
+    def do_GET(self) -> None:
+        self.requests.append(dict(self.headers))
+        if self.path == f"/{MOVED_SPEC_NAME}.json":
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", f"/{SPEC_NAME}.json")
+            self.end_headers()
+        elif self.path != f"/{SPEC_NAME}.json":
+            self.send_response(HTTPStatus.NOT_FOUND)
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == SPEC_ETAG:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.end_headers()
+        else:
+            body = SPEC_CONTENT.encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", SPEC_ETAG)
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def spec_server(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Generator[HTTPServer, Any, None]:
+    """
+    Serves specifications from a local server, caching them beneath tmp_path.
+    """
+    for proxy_variable in ("http_proxy", "HTTP_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(proxy_variable, raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    SpecRequestHandler.requests = []
+
+    server = HTTPServer(("127.0.0.1", 0), SpecRequestHandler)
+    monkeypatch.setattr(cli_main, "GH_RAW_FETCH", f"http://127.0.0.1:{server.server_port}")
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    fetch_spec.cache_clear()
+    yield server
+    fetch_spec.cache_clear()
+
+    server.shutdown()
+    server.server_close()
+    server_thread.join()
+
+
+def test_fetch_spec(spec_server: HTTPServer, tmp_path: Path) -> None:
+    cache_file = tmp_path / cli_main.SPEC_CACHE_DIR_NAME / f"{SPEC_NAME}.json"
+
+    # Nothing is cached, so the specification is downloaded, and cached with its ETag.
+    assert fetch_spec(SPEC_NAME) == SPEC_CONTENT
+    assert "If-None-Match" not in SpecRequestHandler.requests[-1]
+    assert cache_file.read_text() == SPEC_CONTENT
+    assert cache_file.with_suffix(".etag").read_text() == SPEC_ETAG
+
+    # The specification is remembered for the rest of the process.
+    assert fetch_spec(SPEC_NAME) == SPEC_CONTENT
+    assert len(SpecRequestHandler.requests) == 1
+
+    # A new process asks whether the cached copy is still current, and uses it when told so.
+    fetch_spec.cache_clear()
+    cache_file.write_text(SPEC_CONTENT.replace("1994", "1995"))
+    assert fetch_spec(SPEC_NAME) == SPEC_CONTENT.replace("1994", "1995")
+    assert SpecRequestHandler.requests[-1]["If-None-Match"] == SPEC_ETAG
+
+
+def test_fetch_spec_follows_redirects(spec_server: HTTPServer) -> None:
+    assert fetch_spec(MOVED_SPEC_NAME) == SPEC_CONTENT
+    assert len(SpecRequestHandler.requests) == 2, "Redirect was not followed."
+
+
+def test_fetch_spec_not_found(spec_server: HTTPServer, tmp_path: Path) -> None:
+    with pytest.raises(RuntimeError, match="Failed to locate assignment specification"):
+        fetch_spec("not-a-spec")
+    assert not (tmp_path / cli_main.SPEC_CACHE_DIR_NAME / "not-a-spec.json").exists()
+
+
+def test_fetch_spec_offline(spec_server: HTTPServer) -> None:
+    fetch_spec(SPEC_NAME)
+    fetch_spec.cache_clear()
+
+    # Nothing is listening once the server is closed.
+    spec_server.shutdown()
+    spec_server.server_close()
+
+    assert fetch_spec(SPEC_NAME) == SPEC_CONTENT, "Cached copy was not used when offline."
+    with pytest.raises(OSError):
+        fetch_spec("never-fetched")
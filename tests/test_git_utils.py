@@ -0,0 +1,71 @@
+import subprocess
+from pathlib import Path
+
+import git
+import pytest
+
+from assignment_submission_checker.git_utils import (
+    clone_and_fetch_all_refs,
+    repo_name_from_url,
+)
+
+
+@pytest.mark.parametrize(
+    ["url", "expected_name"],
+    [
+        pytest.param("https://github.com/org/x.git", "x", id="HTTPS"),
+        pytest.param("https://github.com/org/x", "x", id="HTTPS, no .git"),
+        pytest.param("https://github.com/org/x.git/", "x", id="HTTPS, trailing /"),
+        pytest.param("https://github.com/org/x/", "x", id="HTTPS, no .git, trailing /"),
+        pytest.param("git@github.com:org/x.git", "x", id="SSH"),
+        pytest.param("git@github.com:x.git", "x", id="SSH, no organisation"),
+        pytest.param("ssh://git@github.com/org/x.git", "x", id="SSH URL"),
+        pytest.param("/tmp/submissions/x", "x", id="Absolute path"),
+        pytest.param("../x/", "x", id="Relative path, trailing /"),
+        pytest.param("x", "x", id="Bare name"),
+        pytest.param("/tmp/my.project.git", "my.project", id="Dots in name"),
+    ],
+)
+def test_repo_name_from_url(url: str, expected_name: str) -> None:
+    assert repo_name_from_url(url) == expected_name
+
+
+@pytest.fixture
+def remote_repo(tmp_path: Path) -> Path:
+    """
+    A repository with work committed to main, and a further branch "feature".
+    """
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    (remote / "a.py").write_text("Placeholder content")
+    with git.Repo.init(remote) as repo:
+        if repo.active_branch.name != "main":
+            repo.git.branch("-m", "main")
+        repo.git.add(".")
+        repo.git.commit("-m", "Commit all work.")
+        repo.git.branch("feature")
+    return remote
+
+
+def test_clone_and_fetch_all_refs(tmp_path: Path, remote_repo: Path) -> None:
+    name = clone_and_fetch_all_refs(str(remote_repo), tmp_path / "clone")
+
+    assert name == "remote"
+    with git.Repo(tmp_path / "clone") as clone:
+        assert {head.name for head in clone.heads} == {"main", "feature"}
+
+
+def test_clone_and_fetch_all_refs_failure(
+    tmp_path: Path, remote_repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Failing to create the local branches raises the same error as a failing clone.
+    """
+
+    def failing_run(args, **kwargs):
+        raise subprocess.CalledProcessError(128, args, stderr="fatal: update-ref failed")
+
+    monkeypatch.setattr(subprocess, "run", failing_run)
+
+    with pytest.raises(git.GitCommandError, match="update-ref failed"):
+        clone_and_fetch_all_refs(str(remote_repo), tmp_path / "clone")
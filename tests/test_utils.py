@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import fnmatch
+import os
+import re
+import shutil
+import stat
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
 import pytest
 
 from assignment_submission_checker.utils import (
+    compile_shell_patterns,
     copy_tree,
     match_to_unique_assignments,
     provide_tmp_directory,
+    remove_tree,
+    remove_tree_in_background,
+    scan_directory,
+    tmp_directory,
 )
 
 if TYPE_CHECKING:
@@ -26,6 +36,40 @@ def always_raise_error() -> None:
     raise SET_ERROR
 
 
+@pytest.mark.parametrize(
+    ["patterns", "flags"],
+    [
+        pytest.param(["*.py"], 0, id="Single pattern"),
+        pytest.param(["README*", "*.ini", "data/*.csv", "?x[!0-9]"], 0, id="Multiple patterns"),
+        pytest.param(["README*", "LICENSE*"], re.IGNORECASE, id="Ignoring case"),
+    ],
+)
+def test_compile_shell_patterns(patterns: List[str], flags: int) -> None:
+    """Compiled expressions should agree with matching each pattern via fnmatch."""
+    names = [
+        "c1.py",
+        "c1.pyc",
+        "README.md",
+        "readme.txt",
+        "LICENSE",
+        "setup.ini",
+        "data/a.csv",
+        "data/b.json",
+        "ax1",
+        "axz",
+    ]
+    compiled = compile_shell_patterns(patterns, flags=flags)
+
+    for name in names:
+        if flags & re.IGNORECASE:
+            expected = any(fnmatch.fnmatchcase(name.lower(), p.lower()) for p in patterns)
+        else:
+            expected = any(fnmatch.fnmatchcase(name, p) for p in patterns)
+        assert bool(compiled.match(name)) == expected, f"Mismatch for {name}"
+
+    assert compile_shell_patterns([]) is None
+
+
 @pytest.mark.parametrize(
     ["make_folder_structure", "copy", "destination", "into", "expected_error"],
     [
@@ -79,6 +123,64 @@ def test_copy_tree(
             assert copied_to == destination
 
 
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="Named pipes are not supported.")
+def test_copy_tree_refuses_special_files(tmp_path: Path) -> None:
+    """Special files are refused, rather than opened (which blocks for a FIFO)."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("Placeholder content")
+    os.mkfifo(tmp_path / "src" / "pipe")
+
+    with pytest.raises(shutil.SpecialFileError):
+        copy_tree(tmp_path / "src", tmp_path / "dest")
+    assert (tmp_path / "dest" / "a.py").read_text() == "Placeholder content"
+
+
+@pytest.mark.parametrize(
+    ["make_folder_structure", "max_workers"],
+    [
+        pytest.param("template_dir_dict", 8, id="Concurrent"),
+        pytest.param("template_dir_dict", 1, id="Sequential"),
+    ],
+    indirect=["make_folder_structure"],
+)
+def test_remove_tree(make_folder_structure, tmp_path: Path, max_workers: int) -> None:
+    """remove_tree should delete the entire tree, including read-only files and links."""
+    root = tmp_path / "top-level-folder"
+    read_only = root / "my-git-submission" / "c1.py"
+    os.chmod(read_only, stat.S_IREAD)
+    os.symlink(tmp_path, root / "link-to-outside")
+
+    remove_tree(root, max_workers=max_workers)
+
+    assert not root.exists()
+    assert tmp_path.is_dir(), "Symbolic link was followed when removing the tree."
+
+
+@pytest.mark.parametrize(
+    ["make_folder_structure"], [pytest.param("template_dir_dict")], indirect=True
+)
+def test_remove_tree_in_background(make_folder_structure, tmp_path: Path) -> None:
+    root = tmp_path / "top-level-folder"
+
+    cleaner = remove_tree_in_background(root)
+    cleaner.join()
+
+    assert not cleaner.daemon, "Interpreter would not wait for the removal to finish."
+    assert not root.exists()
+
+
+def test_scan_directory(tmp_path: Path) -> None:
+    (tmp_path / "a_file.py").touch()
+    (tmp_path / "b_file.txt").touch()
+    (tmp_path / "subdir").mkdir()
+
+    files, subdirs = scan_directory(tmp_path)
+
+    assert files == {"a_file.py", "b_file.txt"}
+    assert list(subdirs) == ["subdir"]
+    assert subdirs["subdir"].path == str(tmp_path / "subdir")
+
+
 @pytest.mark.parametrize(
     [
         "function",
@@ -194,6 +296,45 @@ def test_provide_tmp_directory(
         assert return_val == returned, "Wrapped function did not return expected return value."
 
 
+def test_provide_tmp_directory_per_call(tmp_path: Path) -> None:
+    """Each call should be given its own temporary directory, created when called."""
+    tmp_location = tmp_path / "test-provide-tmp-dir"
+
+    @provide_tmp_directory(pass_dir_as_arg="tmp_dir", where=tmp_location)
+    def wrapped(tmp_dir: Path) -> bool:
+        return tmp_dir.is_dir()
+
+    assert not tmp_location.exists(), "TMP directory created before the function was called."
+    assert wrapped() and wrapped(), "Wrapped function was not provided a directory."
+    assert not tmp_location.exists()
+
+
+@pytest.mark.parametrize(
+    ["clean_on_error", "clean_on_success", "error"],
+    [
+        pytest.param(True, True, None, id="Clean on success"),
+        pytest.param(True, False, None, id="No clean on success"),
+        pytest.param(True, True, SET_ERROR, id="Cleanup on error"),
+        pytest.param(False, True, SET_ERROR, id="No cleanup on error"),
+    ],
+)
+def test_tmp_directory(
+    clean_on_error: bool, clean_on_success: bool, error: Optional[Exception]
+) -> None:
+    try:
+        with tmp_directory(clean_on_error=clean_on_error, clean_on_success=clean_on_success) as t:
+            assert t.is_dir(), "Temporary directory was not created."
+            if error is not None:
+                raise error
+    except type(error) if error is not None else ():
+        pass
+
+    should_be_cleaned = clean_on_success if error is None else clean_on_error
+    assert t.exists() != should_be_cleaned
+    if t.exists():
+        remove_tree(t)
+
+
 @pytest.mark.parametrize(
     ["input", "expected_answers"],
     [
@@ -267,3 +408,5 @@ def test_unique_assignments(input: Dict[Obj, List[Val]], expected_answers: List[
             found_a_valid_answer = True
 
     assert found_a_valid_answer, "An expected answer was not found."
+    if answer:
+        assert list(answer) == list(input), "Objects were not returned in the order given."